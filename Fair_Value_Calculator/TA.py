@@ -1,191 +1,224 @@
-'''
-@project       : Temple University CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/1/2023
-
-Technical Indicators
-
-'''
-
-import os
-import enum
-import calendar
-import math
-import pandas as pd
-import numpy as np
-import sqlite3
-import datetime
-
-from datetime import date
-#from scipy.stats import norm
-
-from math import log, exp, sqrt
-import option
-
-from stock import Stock
-
-
-class SimpleMovingAverages(object):
-    '''
-    On given a OHLCV data frame, calculate corresponding simple moving averages
-    '''
-    def __init__(self, ohlcv_df, periods):
-        self.ohlcv_df = ohlcv_df
-        self.periods = periods
-        self._sma = {}
-
-    def _calc(self, period, price_source):
-        '''
-        for a given period, calc the SMA as a pandas series from the price_source
-        which can be  open, high, low or Close
-        '''
-        result = self.ohlcv_df[price_source].rolling(window=period).mean()
-        return(result)
-        
-    def run(self, price_source = 'Close'):
-        '''
-        Calculate all the simple moving averages
-        '''
-        for period in self.periods:
-            self._sma[period] = self._calc(period, price_source)
-    
-    def get_series(self, period):
-        return(self._sma[period])
-
-    
-class ExponentialMovingAverages(object):
-    '''
-    On given a OHLCV data frame, calculate corresponding simple moving averages
-    '''
-    def __init__(self, ohlcv_df, periods):
-        self.ohlcv_df = ohlcv_df
-        self.periods = periods
-        self._ema = {}
-
-    def _calc(self, period):
-        '''
-        for a given period, calc the SMA as a pandas series
-        '''
-        result = self.ohlcv_df['Close'].ewm(span=period).mean()
-        return(result)
-        
-    def run(self):
-        '''
-        Calculate all the exponential moving averages
-        '''
-        for period in self.periods:
-            self._ema[period] = self._calc(period)
-
-    def get_series(self, period):
-        return(self._ema[period])
-
-
-class RSI(object):
-
-    def __init__(self, ohlcv_df, period = 14):
-        self.ohlcv_df = ohlcv_df
-        self.period = period
-        self.rsi = None
-
-    def get_series(self):
-        return(self.rsi)
-
-    def run(self):
-        '''
-        Calculate all RSIs
-        '''
-
-        diff = self.ohlcv_df['Close'].diff()
-        
-        gain = diff.where(diff > 0, 0)
-        loss = -diff.where(diff < 0, 0) 
-
-        gain = gain.ewm(span=self.period).mean()
-        loss = loss.ewm(span=self.period).mean()
-        
-        rs = gain / loss
-        self.rsi = 100 - (100/(1+rs))
-
-
-class VWAP(object):
-
-    def __init__(self, ohlcv_df):
-        self.ohlcv_df = ohlcv_df
-        self.vwap = None
-
-    def get_series(self):
-        return(self.vwap)
-
-    def run(self):
-        '''
-        Calculate all VWAPs
-        '''
-        typical = (self.ohlcv_df['High'] + self.ohlcv_df['Low'] + self.ohlcv_df['Close']) / 3
-
-        typicalXvol = typical * self.ohlcv_df['Volume']
-        typicalXvol_sum = typicalXvol.cumsum()
-
-        vol_sum = self.ohlcv_df['Volume'].cumsum()
-
-        self.vwap = typicalXvol_sum / vol_sum
-
-
-def _test1():
-    opt = option.Option()
-    # set default settings
-
-    # we use relative path here, you can set it with a full path
-    opt.data_dir = "./data"
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-
-    ticker = 'AAPL'
-    db_connection = sqlite3.connect(opt.sqlite_db)
-    stock = Stock(opt, db_connection, ticker)
-
-    start_date = datetime.date(2020, 1, 1)
-    end_date = datetime.date(2023, 10, 1)
-
-    #start_date = datetime.date(2015, 1, 1)
-    #end_date = datetime.date(2019, 10, 1)
-    
-    df = stock.get_daily_hist_price(start_date, end_date)
-    
-    print(df.head())
-    print(df.tail())
-    
-    periods = [9, 20, 50, 100, 200]
-    smas = SimpleMovingAverages(df, periods)
-    smas.run()
-    s1 = smas.get_series(9)
-    print("9 SMA", s1.index)
-    print("9 SMA", s1.head(10))
-    print("9 SMA", s1.tail(10))
-
-    s2 = smas.get_series(50)
-    print("50 SMA",s2.tail(10))
-
-    emas = ExponentialMovingAverages(df, periods)
-    emas.run()
-    e2 = emas.get_series(50)
-    print("50 EMA",e2.tail(10))
-    
-    rsi_indicator = RSI(df)
-    rsi_indicator.run()
-
-    print(f"RSI for {ticker} is {rsi_indicator.rsi}")
-
-    vwap_indicator = VWAP(df)
-    vwap_indicator.run()
-    vwap_1 = vwap_indicator.get_series()
-    print("Volume Weighed Average Price (VWAP)")
-    print(f"VWAP for {ticker} is {list(vwap_1.items())[-1][1]}")
-    print(vwap_indicator.vwap)
-    
-if __name__ == "__main__":
-    _test1()
-
-    
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/1/2023
+
+Technical Indicators
+
+'''
+
+import os
+import enum
+import calendar
+import math
+import pandas as pd
+import numpy as np
+import datetime
+
+from datetime import date
+#from scipy.stats import norm
+
+from math import log, exp, sqrt
+import option
+import connection
+
+from stock import Stock
+
+
+# fields with an adjusted column in EquityDailyPrice
+ADJUSTED_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def has_adjusted(columns):
+    # True if columns include the adjusted column of every field of ADJUSTED_FIELDS they have
+    columns = set(columns)
+    return(all('Adj' + f in columns for f in ADJUSTED_FIELDS if f in columns or 'Adj' + f in columns))
+
+def price_column(field, adjusted = True, columns = None):
+    '''
+    column holding a price field: Open, High, Low and Close are read from the split and
+    dividend adjusted AdjOpen..AdjClose columns and Volume from the split adjusted AdjVolume,
+    which counts the same shares, unless adjusted is False, as traded prices and volume jump
+    at every split. Other fields are returned as they are
+    columns are the columns of the frame at hand. When some adjusted column is missing from
+    them, as in a database from before it was added, the traded fields are read instead, so
+    adjusted prices are never mixed with traded volume
+    '''
+    if adjusted and field in ADJUSTED_FIELDS and (columns is None or has_adjusted(columns)):
+        return('Adj' + field)
+    return(field)
+
+class SimpleMovingAverages(object):
+    '''
+    On given a OHLCV data frame, calculate corresponding simple moving averages
+    adjusted reads the adjusted prices, see price_column, as for all the indicators below
+    '''
+    def __init__(self, ohlcv_df, periods, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.periods = periods
+        self.adjusted = adjusted
+        self._sma = {}
+
+    def _calc(self, period, price_source):
+        '''
+        for a given period, calc the SMA as a pandas series from the price_source
+        which can be any price column, e.g. AdjClose or Close
+        '''
+        result = self.ohlcv_df[price_source].rolling(window=period).mean()
+        return(result)
+        
+    def run(self, price_source = None):
+        '''
+        Calculate all the simple moving averages
+        price_source is the close by default, adjusted unless the instance is not
+        '''
+        if price_source is None:
+            price_source = price_column('Close', self.adjusted, self.ohlcv_df.columns)
+        for period in self.periods:
+            self._sma[period] = self._calc(period, price_source)
+    
+    def get_series(self, period):
+        return(self._sma[period])
+
+    
+class ExponentialMovingAverages(object):
+    '''
+    On given a OHLCV data frame, calculate corresponding simple moving averages
+    '''
+    def __init__(self, ohlcv_df, periods, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.periods = periods
+        self.adjusted = adjusted
+        self._ema = {}
+
+    def _calc(self, period):
+        '''
+        for a given period, calc the SMA as a pandas series
+        '''
+        result = self.ohlcv_df[price_column('Close', self.adjusted, self.ohlcv_df.columns)].ewm(span=period).mean()
+        return(result)
+        
+    def run(self):
+        '''
+        Calculate all the exponential moving averages
+        '''
+        for period in self.periods:
+            self._ema[period] = self._calc(period)
+
+    def get_series(self, period):
+        return(self._ema[period])
+
+
+class RSI(object):
+
+    def __init__(self, ohlcv_df, period = 14, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.period = period
+        self.adjusted = adjusted
+        self.rsi = None
+
+    def get_series(self):
+        return(self.rsi)
+
+    def run(self):
+        '''
+        Calculate all RSIs
+        '''
+
+        diff = self.ohlcv_df[price_column('Close', self.adjusted, self.ohlcv_df.columns)].diff()
+        
+        gain = diff.where(diff > 0, 0)
+        loss = -diff.where(diff < 0, 0) 
+
+        gain = gain.ewm(span=self.period).mean()
+        loss = loss.ewm(span=self.period).mean()
+        
+        rs = gain / loss
+        self.rsi = 100 - (100/(1+rs))
+
+
+class VWAP(object):
+
+    def __init__(self, ohlcv_df, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.adjusted = adjusted
+        self.vwap = None
+
+    def get_series(self):
+        return(self.vwap)
+
+    def run(self):
+        '''
+        Calculate all VWAPs
+        '''
+        high, low, close = (self.ohlcv_df[price_column(c, self.adjusted, self.ohlcv_df.columns)] for c in ['High', 'Low', 'Close'])
+        typical = (high + low + close) / 3
+
+        volume = self.ohlcv_df[price_column('Volume', self.adjusted, self.ohlcv_df.columns)]
+        typicalXvol = typical * volume
+        typicalXvol_sum = typicalXvol.cumsum()
+
+        vol_sum = volume.cumsum()
+
+        self.vwap = typicalXvol_sum / vol_sum
+
+
+def _test1():
+    opt = option.Option()
+    # set default settings
+
+    # we use relative path here, you can set it with a full path
+    opt.data_dir = "./data"
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    ticker = 'AAPL'
+    manager = connection.get_connection_manager(opt)
+    stock = Stock(opt, manager, ticker)
+
+    start_date = datetime.date(2020, 1, 1)
+    end_date = datetime.date(2023, 10, 1)
+
+    #start_date = datetime.date(2015, 1, 1)
+    #end_date = datetime.date(2019, 10, 1)
+    
+    df = stock.get_daily_hist_price(start_date, end_date)
+    
+    print(df.head())
+    print(df.tail())
+    
+    periods = [9, 20, 50, 100, 200]
+    smas = SimpleMovingAverages(df, periods)
+    smas.run()
+    s1 = smas.get_series(9)
+    print("9 SMA", s1.index)
+    print("9 SMA", s1.head(10))
+    print("9 SMA", s1.tail(10))
+
+    s2 = smas.get_series(50)
+    print("50 SMA",s2.tail(10))
+
+    emas = ExponentialMovingAverages(df, periods)
+    emas.run()
+    e2 = emas.get_series(50)
+    print("50 EMA",e2.tail(10))
+    
+    rsi_indicator = RSI(df)
+    rsi_indicator.run()
+
+    print(f"RSI for {ticker} is {rsi_indicator.rsi}")
+
+    vwap_indicator = VWAP(df)
+    vwap_indicator.run()
+    vwap_1 = vwap_indicator.get_series()
+    print("Volume Weighed Average Price (VWAP)")
+    print(f"VWAP for {ticker} is {list(vwap_1.items())[-1][1]}")
+    print(vwap_indicator.vwap)
+    manager.close()
+    
+if __name__ == "__main__":
+    _test1()
+
+    
@@ -0,0 +1,110 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Connection manager for the Equity.db sqlite database
+
+'''
+
+import os
+import pathlib
+import sqlite3
+import threading
+
+
+class ConnectionManager(object):
+    '''
+    Hands out sqlite connections to one database file
+
+    The database is switched to WAL journaling, so any number of threads can read while a
+    single writer ingests. reader() returns a read only connection private to the calling
+    thread, writer() returns the one read write connection
+    '''
+    def __init__(self, db_file, timeout = 30.0):
+        self.db_file = db_file
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._readers = []
+        self._writer = None
+
+        # WAL has to be turned on by a read write connection and it sticks to the file
+        dirname = os.path.dirname(db_file)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        db_connection = sqlite3.connect(db_file, timeout=timeout)
+        db_connection.execute("PRAGMA journal_mode = WAL")
+        db_connection.close()
+
+    def reader(self):
+        # read only connection for the calling thread, opened on first use
+        db_connection = getattr(self._local, 'reader', None)
+        if db_connection is None:
+            uri = pathlib.Path(self.db_file).resolve().as_uri() + "?mode=ro"
+            # check_same_thread is off only so that close() can run from another thread
+            db_connection = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False)
+            self._local.reader = db_connection
+            with self._lock:
+                self._readers.append(db_connection)
+        return(db_connection)
+
+    def writer(self):
+        # the read write connection, meant to be used by one ingesting thread at a time
+        with self._lock:
+            if self._writer is None:
+                self._writer = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False)
+                self._writer.execute("PRAGMA journal_mode = WAL")
+            return(self._writer)
+
+    def close(self):
+        with self._lock:
+            for db_connection in self._readers:
+                db_connection.close()
+            self._readers = []
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        self._local = threading.local()
+
+
+def get_connection_manager(opt):
+    # connection manager for the sqlite database configured in the option
+    return(ConnectionManager(opt.sqlite_db))
+
+def get_reader(db):
+    # accept either a ConnectionManager or a plain sqlite connection
+    if isinstance(db, ConnectionManager):
+        return(db.reader())
+    return(db)
+
+def _test():
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    db_file = os.path.join(tempfile.mkdtemp(), "Equity.db")
+    manager = ConnectionManager(db_file)
+    writer = manager.writer()
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(1000)])
+    writer.commit()
+
+    def read(i):
+        db_connection = manager.reader()
+        return(threading.get_ident(), db_connection.execute("SELECT SUM(x) FROM t").fetchone()[0])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(read, range(16)))
+    print("sums", set(r[1] for r in results), "threads", len(set(r[0] for r in results)))
+    print("journal mode", manager.reader().execute("PRAGMA journal_mode").fetchone()[0])
+    try:
+        manager.reader().execute("INSERT INTO t VALUES (1)")
+    except sqlite3.OperationalError as e:
+        print("reader is read only:", e)
+    manager.close()
+
+if __name__ == "__main__":
+    _test()
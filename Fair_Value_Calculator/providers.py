@@ -0,0 +1,367 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Market data providers used by the Fetcher and MyYahooFinancials
+
+YahooProvider goes to Yahoo, ReplayProvider serves recorded or synthetic responses offline
+with configurable latency and error injection, and RecordingProvider saves what another
+provider returns so that it can be replayed later
+
+'''
+
+import os
+import json
+import time
+import zlib
+import threading
+import numpy as np
+import pandas as pd
+
+from yahoofinancials import YahooFinancials
+
+
+class ProviderError(Exception):
+    pass
+
+
+class DataProvider(object):
+    '''
+    Interface of a data provider
+
+    get_daily_history returns a frame shaped like yf.Ticker.history(auto_adjust=False): a
+    tz aware Date index and Open, High, Low, Close, Adj Close, Volume, Dividends and
+    Stock Splits columns. As with yahoo, prices, dividends and volume are scaled for every
+    split up to today, whatever end_date is. get_splits returns the ratio of every split of
+    the ticker up to today like yf.Ticker.splits, a Stock Splits series on a tz aware Date
+    index. get_financial_stmts, get_beta and get_num_shares_outstanding return the same as
+    the YahooFinancials methods for a single ticker
+    '''
+    def get_daily_history(self, ticker, start_date, end_date):
+        raise NotImplementedError
+
+    def get_splits(self, ticker):
+        raise NotImplementedError
+
+    def get_financial_stmts(self, ticker, freq, statement_type):
+        raise NotImplementedError
+
+    def get_beta(self, ticker):
+        raise NotImplementedError
+
+    def get_num_shares_outstanding(self, ticker, price_type = 'current'):
+        raise NotImplementedError
+
+    def get_beta_many(self, list_of_tickers):
+        # dict of ticker -> beta
+        return({ticker: self.get_beta(ticker) for ticker in list_of_tickers})
+
+    def get_num_shares_outstanding_many(self, list_of_tickers, price_type = 'current'):
+        # dict of ticker -> number of shares outstanding
+        return({ticker: self.get_num_shares_outstanding(ticker, price_type) for ticker in list_of_tickers})
+
+    def get_financial_stmts_many(self, list_of_tickers, freq, statement_types):
+        # statements of several tickers and types merged into one {key: {ticker: history}} dict
+        result = {}
+        for ticker in list_of_tickers:
+            for statement_type in statement_types:
+                for key, by_ticker in self.get_financial_stmts(ticker, freq, statement_type).items():
+                    result.setdefault(key, {}).update(by_ticker)
+        return(result)
+
+
+class YahooProvider(DataProvider):
+
+    def get_daily_history(self, ticker, start_date, end_date):
+        # only the price downloads need yfinance, the financial data does not
+        import yfinance as yf
+        return(yf.Ticker(ticker).history(start=start_date, end=end_date, auto_adjust=False))
+
+    def get_splits(self, ticker):
+        import yfinance as yf
+        return(yf.Ticker(ticker).splits)
+
+    def get_financial_stmts(self, ticker, freq, statement_type):
+        return(YahooFinancials(ticker).get_financial_stmts(freq, statement_type))
+
+    def get_financial_stmts_many(self, list_of_tickers, freq, statement_types):
+        return(YahooFinancials(list(list_of_tickers)).get_financial_stmts(freq, list(statement_types)))
+
+    def get_beta(self, ticker):
+        return(YahooFinancials(ticker).get_beta())
+
+    def get_num_shares_outstanding(self, ticker, price_type = 'current'):
+        return(YahooFinancials(ticker).get_num_shares_outstanding(price_type))
+
+    def get_beta_many(self, list_of_tickers):
+        beta = YahooFinancials(list(list_of_tickers)).get_beta()
+        return(beta if isinstance(beta, dict) else {})
+
+    def get_num_shares_outstanding_many(self, list_of_tickers, price_type = 'current'):
+        shares = YahooFinancials(list(list_of_tickers)).get_num_shares_outstanding(price_type)
+        return(shares if isinstance(shares, dict) else {})
+
+
+# keys of the yahoo statement responses, by statement type and freq
+STATEMENT_KEYS = {
+    ('income', 'annual'): 'incomeStatementHistory',
+    ('income', 'quarterly'): 'incomeStatementHistoryQuarterly',
+    ('balance', 'annual'): 'balanceSheetHistory',
+    ('balance', 'quarterly'): 'balanceSheetHistoryQuarterly',
+    ('cash', 'annual'): 'cashflowStatementHistory',
+    ('cash', 'quarterly'): 'cashflowStatementHistoryQuarterly',
+}
+
+
+class ReplayProvider(DataProvider):
+    '''
+    Offline provider for tests and benchmarks
+
+    Responses are read from data_dir when a recording exists (see RecordingProvider) and are
+    otherwise generated: prices follow a geometric brownian motion seeded by the ticker, so
+    the same ticker and dates always give the same bars whatever window is asked for.
+    splits is an optional dict of ticker -> {date: ratio} of the splits of the generated
+    tickers, and their history is scaled for them the way yahoo does.
+    Every call sleeps latency seconds plus up to latency_jitter more, and fails with
+    ProviderError with probability error_rate. Both are drawn from the seed, what is asked
+    and how many times it was asked before, so the same tickers fail on the same attempts
+    whatever the order in which worker threads make their calls
+    '''
+    _origin = pd.Timestamp('1990-01-01')
+
+    def __init__(self, data_dir = None, latency = 0.0, latency_jitter = 0.0, error_rate = 0.0,
+                 synthetic = True, seed = 0, tz = 'America/New_York', splits = None):
+        self.data_dir = data_dir
+        self.splits = splits or {}
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.synthetic = synthetic
+        self.seed = seed
+        self.tz = tz
+        self.calls = 0
+        self.errors = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def _simulate_call(self, what):
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(what, 0)
+            self._attempts[what] = attempt + 1
+        rng = np.random.default_rng([zlib.crc32(what.encode()), self.seed, attempt])
+        delay = self.latency + self.latency_jitter * rng.random()
+        fail = rng.random() < self.error_rate
+        if fail:
+            with self._lock:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ProviderError(f"injected error for {what}")
+
+    def _ticker_rng(self, ticker, salt = 0):
+        return(np.random.default_rng([zlib.crc32(ticker.encode()), self.seed, salt]))
+
+    def get_daily_history(self, ticker, start_date, end_date):
+        self._simulate_call(ticker)
+        path = os.path.join(self.data_dir, f"{ticker}_history.csv") if self.data_dir else None
+        if path is not None and os.path.exists(path):
+            df = pd.read_csv(path, index_col='Date')
+            df.index = pd.to_datetime(df.index, utc=True).tz_convert(self.tz)
+        elif self.synthetic:
+            df = self._synthetic_history(ticker, pd.Timestamp(end_date) if end_date else pd.Timestamp.today())
+        else:
+            raise ProviderError(f"no recording for {ticker}")
+
+        start = pd.Timestamp(start_date).tz_localize(df.index.tz)
+        mask = df.index >= start
+        if end_date:
+            mask &= df.index < pd.Timestamp(end_date).tz_localize(df.index.tz)
+        return(df[mask])
+
+    def get_splits(self, ticker):
+        self._simulate_call(f"{ticker} splits")
+        path = os.path.join(self.data_dir, f"{ticker}_splits.csv") if self.data_dir else None
+        if path is not None and os.path.exists(path):
+            splits = pd.read_csv(path, index_col='Date')['Stock Splits']
+            splits.index = pd.to_datetime(splits.index, utc=True).tz_convert(self.tz)
+            return(splits)
+        if self.synthetic:
+            return(self._synthetic_splits(ticker))
+        raise ProviderError(f"no recording of the splits of {ticker}")
+
+    def _synthetic_splits(self, ticker):
+        splits = self.splits.get(ticker, {})
+        index = pd.DatetimeIndex(pd.to_datetime(list(splits.keys())), name='Date').tz_localize(self.tz)
+        return(pd.Series(list(splits.values()), index=index, name='Stock Splits', dtype=np.float64).sort_index())
+
+    def _synthetic_history(self, ticker, end):
+        # business days from a fixed origin so that every window of a ticker is consistent
+        days = np.arange(ReplayProvider._origin.to_datetime64(), end.to_datetime64(), np.timedelta64(1, 'D'))
+        dates = pd.DatetimeIndex(days[np.is_busday(days.astype('datetime64[D]'))], name='Date')
+        n = len(dates)
+        # one generator per column, so a column does not depend on how long the others are
+        rng = self._ticker_rng(ticker)
+        s0 = rng.uniform(20, 300)
+        mu, sigma = rng.uniform(0.02, 0.12), rng.uniform(0.15, 0.45)
+        dt = 1 / 252
+        vol = sigma * np.sqrt(dt)
+        log_returns = (mu - 0.5 * sigma ** 2) * dt + vol * self._ticker_rng(ticker, 2).standard_normal(n)
+        close = s0 * np.exp(np.cumsum(log_returns))
+        open_ = close * np.exp(0.3 * vol * self._ticker_rng(ticker, 3).standard_normal(n))
+        spread = np.abs(self._ticker_rng(ticker, 4).standard_normal(n)) * vol * close
+        high = np.maximum(open_, close) + spread
+        low = np.maximum(np.minimum(open_, close) - spread, 0.01)
+        volume = self._ticker_rng(ticker, 5).lognormal(mean=14, sigma=0.5, size=n).astype(np.int64)
+
+        # quarterly dividend on the first business day of every quarter
+        quarter = dates.year * 4 + (dates.month - 1) // 3
+        first_of_quarter = np.append(True, np.diff(quarter) != 0)
+        dividends = np.where(first_of_quarter, np.round(close * 0.004, 2), 0.0)
+        # the series above are in today's shares, which is how yahoo scales the history,
+        # so a split only shows in the Stock Splits column
+        index = dates.tz_localize(self.tz)
+        splits = self._synthetic_splits(ticker).reindex(index, fill_value=0.0).to_numpy()
+        df = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Adj Close': close,
+                           'Volume': volume, 'Dividends': dividends, 'Stock Splits': splits},
+                          index=index)
+        return(df)
+
+    def get_financial_stmts(self, ticker, freq, statement_type):
+        self._simulate_call(f"{ticker} {freq} {statement_type}")
+        return(self._load_statements(ticker, freq, statement_type))
+
+    def _load_statements(self, ticker, freq, statement_type):
+        path = os.path.join(self.data_dir, f"{ticker}_{freq}_{statement_type}.json") if self.data_dir else None
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                return(json.load(f))
+        if not self.synthetic:
+            raise ProviderError(f"no recording for {ticker} {freq} {statement_type}")
+        return(self._synthetic_statements(ticker, freq, statement_type))
+
+    def get_financial_stmts_many(self, list_of_tickers, freq, statement_types):
+        # one simulated call for the whole batch, like a bulk yahoo request
+        self._simulate_call(f"{len(list_of_tickers)} tickers {freq}")
+        result = {}
+        for ticker in list_of_tickers:
+            for statement_type in statement_types:
+                for key, by_ticker in self._load_statements(ticker, freq, statement_type).items():
+                    result.setdefault(key, {}).update(by_ticker)
+        return(result)
+
+    def get_beta(self, ticker):
+        self._simulate_call(f"{ticker} beta")
+        return(self._load_value(ticker, 'beta'))
+
+    def get_num_shares_outstanding(self, ticker, price_type = 'current'):
+        self._simulate_call(f"{ticker} shares outstanding")
+        return(self._load_value(ticker, f"shares_outstanding_{price_type}"))
+
+    def get_beta_many(self, list_of_tickers):
+        self._simulate_call(f"{len(list_of_tickers)} tickers beta")
+        return({ticker: self._load_value(ticker, 'beta') for ticker in list_of_tickers})
+
+    def get_num_shares_outstanding_many(self, list_of_tickers, price_type = 'current'):
+        self._simulate_call(f"{len(list_of_tickers)} tickers shares outstanding")
+        return({ticker: self._load_value(ticker, f"shares_outstanding_{price_type}") for ticker in list_of_tickers})
+
+    def _load_value(self, ticker, name):
+        # beta or shares outstanding, recorded in {ticker}_{name}.json or generated
+        path = os.path.join(self.data_dir, f"{ticker}_{name}.json") if self.data_dir else None
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                return(json.load(f))
+        if not self.synthetic:
+            raise ProviderError(f"no recording for {ticker} {name}")
+        rng = self._ticker_rng(ticker, salt = 6)
+        beta, shares = rng.uniform(0.5, 1.8), rng.uniform(2e8, 1.6e10)
+        return(float(round(beta, 3)) if name == 'beta' else int(shares))
+
+    def _synthetic_statements(self, ticker, freq, statement_type):
+        # four periods, oldest first like yahoo, with the fields the DCF model uses
+        rng = self._ticker_rng(ticker, salt = 1)
+        revenue = rng.uniform(1e9, 1e11)
+        step = 12 if freq == 'annual' else 3
+        end = pd.Timestamp('2023-09-30')
+        history = []
+        for i in range(3, -1, -1):
+            dt = (end - pd.DateOffset(months=step * i)).strftime('%Y-%m-%d')
+            growth = (1 + rng.normal(0.05, 0.03)) ** (3 - i)
+            rev = revenue * growth
+            if statement_type == 'income':
+                data = {'totalRevenue': rev, 'netIncome': rev * 0.15, 'operatingIncome': rev * 0.2}
+            elif statement_type == 'balance':
+                data = {'totalDebt': rev * 0.4, 'cashAndCashEquivalents': rev * 0.2, 'totalAssets': rev * 1.5}
+            else:
+                data = {'freeCashFlow': rev * 0.12, 'operatingCashFlow': rev * 0.18, 'capitalExpenditure': -rev * 0.06}
+            history.append({dt: {k: float(round(v)) for k, v in data.items()}})
+        return({STATEMENT_KEYS[(statement_type, freq)]: {ticker: history}})
+
+
+class RecordingProvider(DataProvider):
+    '''
+    Pass calls through to another provider and save the responses into data_dir, in the
+    layout ReplayProvider reads back
+    '''
+    def __init__(self, provider, data_dir):
+        self.provider = provider
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+    def get_daily_history(self, ticker, start_date, end_date):
+        df = self.provider.get_daily_history(ticker, start_date, end_date)
+        df.to_csv(os.path.join(self.data_dir, f"{ticker}_history.csv"))
+        return(df)
+
+    def get_splits(self, ticker):
+        splits = self.provider.get_splits(ticker)
+        splits.to_csv(os.path.join(self.data_dir, f"{ticker}_splits.csv"))
+        return(splits)
+
+    def get_financial_stmts(self, ticker, freq, statement_type):
+        result = self.provider.get_financial_stmts(ticker, freq, statement_type)
+        self._save(f"{ticker}_{freq}_{statement_type}.json", result)
+        return(result)
+
+    def get_beta(self, ticker):
+        result = self.provider.get_beta(ticker)
+        self._save(f"{ticker}_beta.json", result)
+        return(result)
+
+    def get_num_shares_outstanding(self, ticker, price_type = 'current'):
+        result = self.provider.get_num_shares_outstanding(ticker, price_type)
+        self._save(f"{ticker}_shares_outstanding_{price_type}.json", result)
+        return(result)
+
+    def _save(self, name, result):
+        with open(os.path.join(self.data_dir, name), 'w') as f:
+            json.dump(result, f, default=str)
+
+
+def _test():
+    provider = ReplayProvider(latency=0.01, error_rate=0.2, seed=42)
+    ok = 0
+    for ticker in ['AAPL', 'MSFT', 'NVDA', 'JNJ', 'TSLA']:
+        try:
+            provider.get_daily_history(ticker, '2023-01-01', '2023-02-01')
+            ok += 1
+        except ProviderError as e:
+            print(e)
+    print(f"{ok} ok, calls {provider.calls}, errors {provider.errors}")
+
+    provider = ReplayProvider()
+    a = provider.get_daily_history('AAPL', '2020-01-01', '2023-01-01')
+    b = provider.get_daily_history('AAPL', '2022-06-01', '2022-07-01')
+    print("windows agree:", a.loc[b.index].equals(b))
+    print(b.head())
+    print(provider.get_financial_stmts('AAPL', 'annual', 'cash'))
+    print("beta", provider.get_beta('AAPL'), "shares", provider.get_num_shares_outstanding('AAPL'))
+
+if __name__ == "__main__":
+    _test()
@@ -1,75 +1,99 @@
-'''
-@project       : CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/2023
-
-Script to run Discounted Cash Flow Model
-
-'''
-
-import os
-import sqlite3
-import option
-import datetime
-
-# replace by your own version
-#from DCF_model import DiscountedCashFlowModel
-from DCF_model import DiscountedCashFlowModel
-#from stock import Stock
-from stock import Stock
-
-def get_eps_next_5Y(ticker):
-    # return the EPS growth rate for the next 5Y by calling an API or reading from a database
-    # However, for our own purpose, we read it from finviz.com and hard-coded the numbers here
-    # 
-    _data = {'AAPL': 0.0627, 'BABA': 0.1197, 'TSLA': 0.0363, 'NVDA': 0.7870, 'JNJ': 0.052,
-             }
-    if ticker in _data.keys():
-        return _data[ticker]
-    else:
-        print(f"No EPS growth rate found for {ticker}")
-        return None
-
-def run():
-    #
-    parser = option.get_default_parser()
-    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
-    
-    args = parser.parse_args()
-    opt = option.Option(args = args)
-
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-
-    db_file = opt.sqlite_db
-    db_connection = sqlite3.connect(db_file)
-    
-    if opt.tickers is not None:
-        list_of_tickers = opt.tickers.split(',')
-    
-    else:
-        list_of_tickers = ['AAPL']
-
-    as_of_date = datetime.date(2023, 10, 1)
-
-    for ticker in list_of_tickers:
-        eps5y = get_eps_next_5Y(ticker)
-        print(eps5y)
-
-        stock = Stock(opt, db_connection, ticker)
-        stock.load_financial_data()
-        
-        model = DiscountedCashFlowModel(stock, as_of_date)
-        # long term eps growth rate is assumed to be at 4%
-        model.set_FCC_growth_rate(eps5y, eps5y/2, 0.04)
-        
-        model_price = model.calc_fair_value()
-
-        print(f"Fair value for {ticker} based on DCF is {model_price}")
-
-if __name__ == "__main__":
-    run()
-    
+'''
+@project       : CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/2023
+
+Script to run Discounted Cash Flow Model
+
+'''
+
+import os
+import option
+import datetime
+
+# replace by your own version
+#from DCF_model import DiscountedCashFlowModel
+from DCF_model import DiscountedCashFlowModel
+#from stock import Stock
+from statement_cache import StatementCache
+import utils
+import providers
+import connection
+from stock import Stock
+
+def get_eps_next_5Y(ticker):
+    # return the EPS growth rate for the next 5Y by calling an API or reading from a database
+    # However, for our own purpose, we read it from finviz.com and hard-coded the numbers here
+    # 
+    _data = {'AAPL': 0.0627, 'BABA': 0.1197, 'TSLA': 0.0363, 'NVDA': 0.7870, 'JNJ': 0.052,
+             }
+    if ticker in _data.keys():
+        return _data[ticker]
+    else:
+        print(f"No EPS growth rate found for {ticker}")
+        return None
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
+    parser.add_argument('--ttl_days', dest = 'ttl_days', type=float, default=30, help='days before cached financial statements are downloaded again')
+    parser.add_argument('--chunk_size', dest = 'chunk_size', type=int, default=50, help='tickers per bulk financial data request')
+    parser.add_argument('--workers', dest = 'workers', type=int, default=4, help='bulk requests in flight')
+    parser.add_argument('--as_of_dates', dest = 'as_of_dates', default='2023-10-01', help='valuation dates (YYYY-MM-DD) with , separator')
+    parser.add_argument('--refresh', action='store_true', dest='refresh', default=False, help='download the financial statements even when cached')
+    parser.add_argument('--reporting_lag_days', dest='reporting_lag_days', type=int, default=None,
+                        help='days after the period end before a statement is used, 90 for annual statements by default')
+    parser.add_argument('--replay_dir', dest='replay_dir', default=None,
+                        help='run offline from the recordings in this directory, synthetic data for the rest')
+    
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    manager = connection.get_connection_manager(opt)
+    statement_cache = StatementCache(manager.writer(), ttl_days=opt.ttl_days)
+    
+    if opt.tickers is not None:
+        list_of_tickers = opt.tickers.split(',')
+    
+    else:
+        list_of_tickers = ['AAPL']
+
+    # every date is valued from the same statement history, without loading it again
+    as_of_dates = [datetime.date.fromisoformat(d) for d in opt.as_of_dates.split(',')]
+
+    # financial data of all the tickers in a few bulk requests
+    provider = providers.ReplayProvider(opt.replay_dir) if opt.replay_dir is not None else None
+    yfins = utils.load_many(list_of_tickers, provider=provider, cache=statement_cache, refresh=opt.refresh,
+                            chunk_size=opt.chunk_size, max_workers=opt.workers,
+                            reporting_lag_days=opt.reporting_lag_days)
+
+    for ticker in list_of_tickers:
+        if ticker not in yfins:
+            continue
+        eps5y = get_eps_next_5Y(ticker)
+        print(eps5y)
+
+        stock = Stock(opt, manager, ticker, yfin=yfins[ticker])
+        
+        for as_of_date in as_of_dates:
+            model = DiscountedCashFlowModel(stock, as_of_date)
+            # long term eps growth rate is assumed to be at 4%
+            model.set_FCC_growth_rate(eps5y, eps5y/2, 0.04)
+            
+            model_price = model.calc_fair_value()
+
+            print(f"Fair value for {ticker} as of {as_of_date} based on DCF is {model_price}")
+
+    print(f"Statement cache {statement_cache.stats()}")
+    manager.close()
+
+if __name__ == "__main__":
+    run()
+    
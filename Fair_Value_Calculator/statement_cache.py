@@ -0,0 +1,117 @@
+'''
+@project       : CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Persistent cache of the Yahoo financial statements in the Equity.db sqlite database
+
+'''
+
+import json
+import datetime
+import sqlite3
+import threading
+
+
+class StatementCache(object):
+    '''
+    Yahoo responses stored in the FinancialStatement table, keyed on (Ticker, Freq, StatementType)
+
+    StatementType is 'income', 'balance' or 'cash' for the statements. Values that are not
+    statements, such as the beta and the number of shares outstanding, are kept under their
+    own name with Freq 'latest'. An entry older than ttl_days is treated as missing, so it
+    is downloaded again the next time it is needed
+    '''
+    _ddl = '''
+    CREATE TABLE IF NOT EXISTS FinancialStatement (
+        Ticker        TEXT NOT NULL,
+        Freq          TEXT NOT NULL,
+        StatementType TEXT NOT NULL,
+        Data          TEXT NOT NULL,
+        FetchedAt     TEXT NOT NULL,
+        PRIMARY KEY (Ticker, Freq, StatementType)
+    ) WITHOUT ROWID
+    '''
+
+    def __init__(self, db_connection, ttl_days = 30):
+        self.db_connection = db_connection
+        self.ttl_days = ttl_days
+        self.hits = 0
+        self.misses = 0
+        # the connection may be shared by the threads loading statements
+        self._lock = threading.Lock()
+        with self._lock:
+            self.db_connection.execute(StatementCache._ddl)
+            self.db_connection.commit()
+
+    def _is_fresh(self, fetched_at):
+        if self.ttl_days is None:
+            return(True)
+        age = datetime.datetime.now() - datetime.datetime.fromisoformat(fetched_at)
+        return(age <= datetime.timedelta(days=self.ttl_days))
+
+    def get(self, ticker, freq, statement_type):
+        # cached value, or None if it is missing or older than the ttl
+        with self._lock:
+            row = self.db_connection.execute(
+                "SELECT Data, FetchedAt FROM FinancialStatement WHERE Ticker = ? AND Freq = ? AND StatementType = ?",
+                (ticker, freq, statement_type)).fetchone()
+            if row is None or not self._is_fresh(row[1]):
+                self.misses += 1
+                return(None)
+            self.hits += 1
+        return(json.loads(row[0]))
+
+    def put(self, ticker, freq, statement_type, data):
+        fetched_at = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self.db_connection.execute(
+                """INSERT INTO FinancialStatement (Ticker, Freq, StatementType, Data, FetchedAt) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (Ticker, Freq, StatementType) DO UPDATE SET Data = excluded.Data, FetchedAt = excluded.FetchedAt""",
+                (ticker, freq, statement_type, json.dumps(data, default=str), fetched_at))
+            self.db_connection.commit()
+
+    def get_or_fetch(self, ticker, freq, statement_type, fetch, refresh = False):
+        '''
+        cached value, calling fetch() and storing its result when there is none or refresh is set
+        '''
+        if not refresh:
+            data = self.get(ticker, freq, statement_type)
+            if data is not None:
+                return(data)
+        data = fetch()
+        if data is not None:
+            self.put(ticker, freq, statement_type, data)
+        return(data)
+
+    def invalidate(self, ticker = None):
+        # drop the entries of a ticker, or all of them when ticker is None
+        with self._lock:
+            if ticker is None:
+                self.db_connection.execute("DELETE FROM FinancialStatement")
+            else:
+                self.db_connection.execute("DELETE FROM FinancialStatement WHERE Ticker = ?", (ticker,))
+            self.db_connection.commit()
+
+    def stats(self):
+        return({'hits': self.hits, 'misses': self.misses})
+
+
+def _test():
+    cache = StatementCache(sqlite3.connect(':memory:'), ttl_days=1)
+    calls = []
+    def fetch():
+        calls.append(1)
+        return({'incomeStatementHistory': {'AAPL': [{'2023-09-30': {'totalRevenue': 383285000000}}]}})
+
+    for i in range(3):
+        data = cache.get_or_fetch('AAPL', 'annual', 'income', fetch)
+    print(data, "network calls", len(calls), cache.stats())
+    cache.get_or_fetch('AAPL', 'annual', 'income', fetch, refresh=True)
+    print("network calls after refresh", len(calls))
+
+if __name__ == "__main__":
+    _test()
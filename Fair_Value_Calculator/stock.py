@@ -1,157 +1,173 @@
-'''
-@project       : Temple University CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/1/2023
-
-Download daily stock price from Yahoo
-
-'''
-
-import os
-import pandas as pd
-import numpy as np
-import math
-import datetime 
-import sqlite3
-
-from utils import MyYahooFinancials 
-import option
-
-class Stock(object):
-    '''
-    Stock class for getting financial statements
-    default freq is annual
-    '''
-    def __init__(self, opt, db_connection, ticker, spot_price = None, sigma = None, dividend_yield = 0, freq = 'annual'):
-        self.opt = opt
-        self.db_connection = db_connection
-        self.ticker = ticker
-        self.spot_price = spot_price
-        self.sigma = sigma
-        self.dividend_yield = dividend_yield
-        
-        self.yfin = MyYahooFinancials(ticker, freq)
-
-    def get_daily_hist_price(self, start_date, end_date):
-        # Get daily historical OHLCV from database
-        try:
-            sql = f"select * from EquityDailyPrice where ticker = '{self.ticker}' order by AsOfDate asc"
-            df = pd.read_sql(sql, self.db_connection)
-            df['AsOfDate'] = df['AsOfDate'].apply(lambda x: datetime.datetime.strptime(x[:10], "%Y-%m-%d").date())
-
-            # filter data between start and end date
-            df = df[ df.AsOfDate >= start_date ]
-            df = df[ df.AsOfDate <= end_date ]
-
-            # create an index based on the AsOfDate column
-            df['Date'] = df.AsOfDate
-            df = df.set_index('Date')
-            
-            self.ohlcv_df = df
-            return(df)
-            
-        except Exception as e:
-            print(f"Failed to get data for {self.ticker}: {e}")
-            raise Exception(e)
-
-    def load_financial_data(self):
-        #
-        print(f"Loading financial data for {self.ticker}")
-        self.yfin.load_latest_data()
-        
-    def calc_returns(self):
-        # ...
-        self.ohlcv_df['prev_Close'] = self.ohlcv_df['Close'].shift(1)
-        self.ohlcv_df['returns'] = (self.ohlcv_df['Close'] - self.ohlcv_df['prev_Close'])/ \
-                                        self.ohlcv_df['prev_Close']
-        
-    def get_total_debt(self):
-        # gets total debt from balance sheet
-        result = self.yfin.get_balance_sheet_data('totalDebt') 
-        return(result)
-
-    def get_free_cashflow(self):
-        # gets free cashflow from cashflow statement
-        result = self.yfin.get_cashflow_data('freeCashFlow')
-        return(result)
-
-    def get_cash_and_cash_equivalent(self):
-        # gets total of cash and short term investments from balance sheet
-        result = self.yfin.get_balance_sheet_data('cashAndCashEquivalents') 
-        return(result)
-
-    def get_num_shares_outstanding(self):
-        # gets number of shares outstanding
-        result = self.yfin.get_num_shares_outstanding()
-        return(result)
-
-    def get_beta(self):
-        # gets current beta
-        result = self.yfin.get_beta()
-        return(result)
-
-    def lookup_wacc_by_beta(self, beta):
-        # lookup wacc by using the table in Slide 15 of the DiscountedCashFlowModel lecture powerpoint
-        result = None
-        result = None
-        if(beta < 0.8):
-            result = 0.05
-        elif(beta < 1):
-            result = 0.06
-        elif(beta < 1.1):
-            result = 0.065
-        elif(beta < 1.2):
-            result = 0.07
-        elif(beta < 1.3):
-            result = 0.075
-        elif(beta < 1.5):
-            result = 0.08
-        elif(beta < 1.6):
-            result = 0.085
-        else:
-            result = 0.09
-
-        return(result)
-
-def _test():
-    # a few basic unit tests
-    parser = option.get_default_parser()
-    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
-    
-    args = parser.parse_args()
-    opt = option.Option(args = args)
-
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-
-    db_file = opt.sqlite_db
-    db_connection = sqlite3.connect(db_file)
-
-    print(vars(opt))
-    
-    symbol = 'AAPL'
-    freq = 'annual'
-    stock = Stock(opt, db_connection, symbol, freq = freq)
-
-    start_date = datetime.date(2020, 1, 1)
-    end_date = datetime.date(2023, 10, 1)
-    df = stock.get_daily_hist_price(start_date, end_date)
-    print(df.head())
-
-    stock.load_financial_data()
-    print(f"Getting Financial Data for {symbol} with freq {freq}")
-
-    beta = stock.get_beta()
-
-    print('Total Debt: ', stock.get_total_debt())
-    print('Free Cashflow: ', stock.get_free_cashflow())
-    print('Cash and Cash equivalent: ', stock.get_cash_and_cash_equivalent())
-    print('Shares outstanding: ', stock.get_num_shares_outstanding())
-    print(beta)
-    print('WACC: ', stock.lookup_wacc_by_beta(beta))
-    
-if __name__ == "__main__":
-    _test()
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/1/2023
+
+Download daily stock price from Yahoo
+
+'''
+
+import os
+import pandas as pd
+import numpy as np
+import math
+import datetime 
+
+from utils import MyYahooFinancials 
+import option
+import connection
+
+class Stock(object):
+    '''
+    Stock class for getting financial statements
+    default freq is annual
+    db_connection is a sqlite connection or a connection.ConnectionManager
+    '''
+    def __init__(self, opt, db_connection, ticker, spot_price = None, sigma = None, dividend_yield = 0, freq = 'annual',
+                 statement_cache = None, refresh = False, yfin = None, provider = None, reporting_lag_days = None):
+        # statement_cache is an optional statement_cache.StatementCache that keeps the financial
+        # statements between runs, refresh downloads them again even when cached
+        # yfin is an already loaded MyYahooFinancials, see utils.load_many
+        # provider is an optional providers.DataProvider used instead of querying yahoo
+        # reporting_lag_days is the delay before a statement is known, see utils.REPORTING_LAG_DAYS
+        self.opt = opt
+        self.db_connection = db_connection
+        self.ticker = ticker
+        self.spot_price = spot_price
+        self.sigma = sigma
+        self.dividend_yield = dividend_yield
+        
+        if yfin is None:
+            yfin = MyYahooFinancials(ticker, freq, provider=provider, cache=statement_cache, refresh=refresh,
+                                     reporting_lag_days=reporting_lag_days)
+        self.yfin = yfin
+
+    def get_daily_hist_price(self, start_date, end_date):
+        # Get daily historical OHLCV from database
+        try:
+            # filter data between start and end date in the query. AsOfDate is compared as YYYY-MM-DD text
+            # and the end is made exclusive one day later, so rows stored with a time part are still included
+            sql = "select * from EquityDailyPrice where Ticker = ? and AsOfDate >= ? and AsOfDate < ? order by AsOfDate asc"
+            params = (self.ticker, start_date.strftime("%Y-%m-%d"),
+                      (end_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+            df = pd.read_sql(sql, connection.get_reader(self.db_connection), params=params)
+            df['AsOfDate'] = pd.to_datetime(df['AsOfDate'].str[:10], format="%Y-%m-%d").dt.date
+
+            # create an index based on the AsOfDate column
+            df['Date'] = df.AsOfDate
+            df = df.set_index('Date')
+            
+            self.ohlcv_df = df
+            return(df)
+            
+        except Exception as e:
+            print(f"Failed to get data for {self.ticker}: {e}")
+            raise Exception(e)
+
+    def load_financial_data(self):
+        #
+        print(f"Loading financial data for {self.ticker}")
+        self.yfin.load_latest_data()
+        
+    def calc_returns(self, price_source = None):
+        # daily returns from the split and dividend adjusted close by default, as traded
+        # prices drop at every split and ex-dividend date. A database from before the
+        # adjusted columns only has the traded close, which is used instead
+        if price_source is None:
+            price_source = 'AdjClose' if 'AdjClose' in self.ohlcv_df.columns else 'Close'
+            if price_source == 'Close':
+                print(f"Warning: no adjusted prices for {self.ticker}, returns are from the traded close")
+        self.ohlcv_df['prev_Close'] = self.ohlcv_df[price_source].shift(1)
+        self.ohlcv_df['returns'] = (self.ohlcv_df[price_source] - self.ohlcv_df['prev_Close'])/ \
+                                        self.ohlcv_df['prev_Close']
+        
+    def get_total_debt(self, as_of_date = None):
+        # gets total debt from balance sheet, the latest one or the one known on as_of_date
+        result = self.yfin.get_balance_sheet_data('totalDebt', as_of_date) 
+        return(result)
+
+    def get_free_cashflow(self, as_of_date = None):
+        # gets free cashflow from cashflow statement, the latest one or the one known on as_of_date
+        result = self.yfin.get_cashflow_data('freeCashFlow', as_of_date)
+        return(result)
+
+    def get_cash_and_cash_equivalent(self, as_of_date = None):
+        # gets total of cash and short term investments from balance sheet, the latest one or the one known on as_of_date
+        result = self.yfin.get_balance_sheet_data('cashAndCashEquivalents', as_of_date) 
+        return(result)
+
+    def get_num_shares_outstanding(self):
+        # gets number of shares outstanding
+        result = self.yfin.get_num_shares_outstanding()
+        return(result)
+
+    def get_beta(self):
+        # gets current beta
+        result = self.yfin.get_beta()
+        return(result)
+
+    def lookup_wacc_by_beta(self, beta):
+        # lookup wacc by using the table in Slide 15 of the DiscountedCashFlowModel lecture powerpoint
+        result = None
+        result = None
+        if(beta < 0.8):
+            result = 0.05
+        elif(beta < 1):
+            result = 0.06
+        elif(beta < 1.1):
+            result = 0.065
+        elif(beta < 1.2):
+            result = 0.07
+        elif(beta < 1.3):
+            result = 0.075
+        elif(beta < 1.5):
+            result = 0.08
+        elif(beta < 1.6):
+            result = 0.085
+        else:
+            result = 0.09
+
+        return(result)
+
+def _test():
+    # a few basic unit tests
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
+    
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    manager = connection.get_connection_manager(opt)
+
+    print(vars(opt))
+    
+    symbol = 'AAPL'
+    freq = 'annual'
+    stock = Stock(opt, manager, symbol, freq = freq)
+
+    start_date = datetime.date(2020, 1, 1)
+    end_date = datetime.date(2023, 10, 1)
+    df = stock.get_daily_hist_price(start_date, end_date)
+    print(df.head())
+
+    stock.load_financial_data()
+    print(f"Getting Financial Data for {symbol} with freq {freq}")
+
+    beta = stock.get_beta()
+
+    print('Total Debt: ', stock.get_total_debt())
+    print('Free Cashflow: ', stock.get_free_cashflow())
+    print('Cash and Cash equivalent: ', stock.get_cash_and_cash_equivalent())
+    print('Shares outstanding: ', stock.get_num_shares_outstanding())
+    print(beta)
+    print('WACC: ', stock.lookup_wacc_by_beta(beta))
+    manager.close()
+    
+if __name__ == "__main__":
+    _test()
@@ -1,124 +1,325 @@
-'''
-@project       : Temple University
-@Instructor    : Dr. Alex Pang
-@Date          : Sept 2023
-
-@Student Name  : Giorgio Tatarelli
-
-https://github.com/JECSand/yahoofinancials
-
-'''
-
-from yahoofinancials import YahooFinancials 
-
-class MyYahooFinancials(YahooFinancials):
-    '''
-    Extended class based on YahooFinancial libary
-
-    '''
-    def __init__(self, ticker, freq = 'annual'):
-        YahooFinancials.__init__(self, ticker)
-        self.ticker = ticker
-        self.freq = freq
-        self._income_statement_data = {}
-        self._balance_sheet_data = {}
-        self._cashflow_data = {}
-
-    def load_latest_data(self):
-        # load all the latest balance sheet, income statement and cashflow statement data
-        self._get_income_statement_history()        
-        self._get_balance_sheet_history()
-        self._get_cashflow_statement_history()
-
-        
-    def get_income_statement_data(self, name):
-        if name in self._income_statement_data.keys():
-            return(self._income_statement_data[name])
-        else:
-            return None
-
-    def get_balance_sheet_data(self, name):
-        if name in self._balance_sheet_data.keys():
-            return(self._balance_sheet_data[name])
-        else:
-            return None
-    
-    def get_cashflow_data(self, name):
-        if name in self._cashflow_data.keys():
-            return(self._cashflow_data[name])
-        else:
-            return None
-
-        
-    def print_all_data(self):
-        # print all data available
-        print(f"Income Statement Data as of {self._income_statement_asof_date} are")
-        for k, v in self._income_statement_data.items():
-            print(f"{k}: {v}")
-        print("\n\n")
-        print(f"Balance Sheet Data as of {self._balance_sheet_asof_date} are")
-        for k, v in self._balance_sheet_data.items():
-            print(f"{k}: {v}")
-        print("\n\n")
-        print(f"Cashflow Statement Data as of {self._cashflow_asof_date} are")
-        # show all data available
-        for k, v in self._cashflow_data.items():
-            print(f"{k}: {v}")
-            
-    def _get_income_statement_history(self):
-        if self.freq == 'annual':
-            key = 'incomeStatementHistory'
-        elif self.freq == 'quarterly':
-            key = 'incomeStatementHistoryQuarterly'
-
-        # save the latest history
-        hist = self.get_financial_stmts(self.freq, 'income')[key][self.ticker][-1]
-        dt = list(hist.keys())[0]
-        self._income_statement_asof_date = dt
-        # cashflow data is a dict
-        self._income_statement_data = hist[dt]
-        
-    def _get_balance_sheet_history(self):
-        if self.freq == 'annual':
-            key = 'balanceSheetHistory'
-        elif self.freq == 'quarterly':
-            key = 'balanceSheetHistoryQuarterly'
-
-        # save the latest history
-        hist = self.get_financial_stmts(self.freq, 'balance')[key][self.ticker][-1]
-        dt = list(hist.keys())[0]
-        self._balance_sheet_asof_date = dt
-        # cashflow data is a dict
-        self._balance_sheet_data = hist[dt]
-        
-    def _get_cashflow_statement_history(self):
-        #
-        if self.freq == 'annual':
-            key = 'cashflowStatementHistory'
-        elif self.freq == 'quarterly':
-            key = 'cashflowStatementHistoryQuarterly'
-
-        # save the latest history
-        hist = self.get_financial_stmts(self.freq, 'cash')[key][self.ticker][-1]
-        dt = list(hist.keys())[0]
-        self._cashflow_asof_date = dt
-        # cashflow data is a dict
-        self._cashflow_data = hist[dt]
-            
-def _test():
-    symbol = 'AAPL'
-    freq = freq='quarterly'
-    yfinance = MyYahooFinancials(symbol, freq)
-
-    yfinance.load_latest_data()
-    
-    print(f"Getting Financial Data for {symbol} with freq {freq}\n\n")
-    
-    yfinance.print_all_data()
-    # example of how to get some of the data
-    print("Total Revenue: ", yfinance.get_income_statement_data('totalRevenue'))    
-    print("Free Cashflow: ", yfinance.get_cashflow_data('freeCashFlow'))
-
-
-if __name__ == "__main__":
-    _test()
+'''
+@project       : Temple University
+@Instructor    : Dr. Alex Pang
+@Date          : Sept 2023
+
+@Student Name  : Giorgio Tatarelli
+
+https://github.com/JECSand/yahoofinancials
+
+'''
+
+import bisect
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from yahoofinancials import YahooFinancials 
+
+from providers import STATEMENT_KEYS
+
+STATEMENT_TYPES = ('income', 'balance', 'cash')
+
+# default days between the end of a period and the publication of its statements, by freq:
+# the SEC filing deadlines of the 10-K and the 10-Q for the smaller filers
+REPORTING_LAG_DAYS = {'annual': 90, 'quarterly': 45}
+
+class StatementHistory(object):
+    '''
+    Every period of one statement, ordered by period end date
+
+    history is the list of {date: data} dicts yahoo returns. as_of finds the latest period
+    that ended on or before a date with a binary search over the sorted dates
+    '''
+    __slots__ = ('dates', 'periods')
+
+    def __init__(self, history = None):
+        items = sorted(((dt, data) for period in (history or []) for dt, data in period.items()),
+                       key=lambda item: item[0])
+        self.dates = [dt for dt, data in items]
+        self.periods = [data for dt, data in items]
+
+    def __len__(self):
+        return(len(self.dates))
+
+    def latest(self):
+        # (period end date, data) of the latest period, (None, {}) when there is none
+        if len(self.dates) == 0:
+            return(None, {})
+        return(self.dates[-1], self.periods[-1])
+
+    def as_of(self, as_of_date):
+        # (period end date, data) of the latest period ended on or before as_of_date
+        if as_of_date is None:
+            return(self.latest())
+        if not isinstance(as_of_date, str):
+            as_of_date = as_of_date.strftime('%Y-%m-%d')
+        i = bisect.bisect_right(self.dates, as_of_date)
+        if i == 0:
+            return(None, {})
+        return(self.dates[i - 1], self.periods[i - 1])
+
+    def get(self, name, as_of_date = None):
+        return(self.as_of(as_of_date)[1].get(name))
+
+
+class MyYahooFinancials(YahooFinancials):
+    '''
+    Extended class based on YahooFinancial libary
+
+    '''
+    def __init__(self, ticker, freq = 'annual', provider = None, cache = None, refresh = False,
+                 reporting_lag_days = None):
+        # provider is an optional providers.DataProvider, such as a ReplayProvider, used for
+        # the statements, beta and shares outstanding instead of querying yahoo
+        # cache is an optional statement_cache.StatementCache, refresh downloads again even when cached
+        # reporting_lag_days defaults to REPORTING_LAG_DAYS of freq
+        YahooFinancials.__init__(self, ticker)
+        self.ticker = ticker
+        self.freq = freq
+        self.provider = provider
+        self.cache = cache
+        self.refresh = refresh
+        # responses already retrieved by load_many, by (freq, name)
+        self._prefetched = {}
+        # statements are published some time after the period ends, a period only counts as
+        # known reporting_lag_days after its end date in the as of lookups
+        if reporting_lag_days is None:
+            reporting_lag_days = REPORTING_LAG_DAYS.get(freq, 0)
+        self.reporting_lag_days = reporting_lag_days
+        self._income_statement_history = StatementHistory()
+        self._balance_sheet_history = StatementHistory()
+        self._cashflow_history = StatementHistory()
+        self._income_statement_data = {}
+        self._balance_sheet_data = {}
+        self._cashflow_data = {}
+
+    def _cached(self, freq, name, fetch):
+        if (freq, name) in self._prefetched:
+            return(self._prefetched[(freq, name)])
+        if self.cache is None:
+            return(fetch())
+        return(self.cache.get_or_fetch(self.ticker, freq, name, fetch, refresh=self.refresh))
+
+    def get_financial_stmts(self, frequency, statement_type, reformat = True):
+        def fetch():
+            if self.provider is not None:
+                return(self.provider.get_financial_stmts(self.ticker, frequency, statement_type))
+            return(YahooFinancials.get_financial_stmts(self, frequency, statement_type, reformat))
+        return(self._cached(frequency, statement_type, fetch))
+
+    def get_beta(self):
+        def fetch():
+            if self.provider is not None:
+                return(self.provider.get_beta(self.ticker))
+            return(YahooFinancials.get_beta(self))
+        return(self._cached('latest', 'beta', fetch))
+
+    def get_num_shares_outstanding(self, price_type = 'current'):
+        def fetch():
+            if self.provider is not None:
+                return(self.provider.get_num_shares_outstanding(self.ticker, price_type))
+            return(YahooFinancials.get_num_shares_outstanding(self, price_type))
+        return(self._cached('latest', f"shares_outstanding_{price_type}", fetch))
+
+    def _lagged(self, as_of_date):
+        if self.reporting_lag_days:
+            as_of_date = as_of_date - datetime.timedelta(days=self.reporting_lag_days)
+        return(as_of_date)
+
+    def load_latest_data(self):
+        # load all the latest balance sheet, income statement and cashflow statement data
+        self._get_income_statement_history()        
+        self._get_balance_sheet_history()
+        self._get_cashflow_statement_history()
+
+        
+    def get_income_statement_data(self, name, as_of_date = None):
+        # latest value, or the value of the latest period known on as_of_date
+        if as_of_date is not None:
+            return(self._income_statement_history.get(name, self._lagged(as_of_date)))
+        if name in self._income_statement_data.keys():
+            return(self._income_statement_data[name])
+        else:
+            return None
+
+    def get_balance_sheet_data(self, name, as_of_date = None):
+        # latest value, or the value of the latest period known on as_of_date
+        if as_of_date is not None:
+            return(self._balance_sheet_history.get(name, self._lagged(as_of_date)))
+        if name in self._balance_sheet_data.keys():
+            return(self._balance_sheet_data[name])
+        else:
+            return None
+    
+    def get_cashflow_data(self, name, as_of_date = None):
+        # latest value, or the value of the latest period known on as_of_date
+        if as_of_date is not None:
+            return(self._cashflow_history.get(name, self._lagged(as_of_date)))
+        if name in self._cashflow_data.keys():
+            return(self._cashflow_data[name])
+        else:
+            return None
+
+        
+    def print_all_data(self):
+        # print all data available
+        print(f"Income Statement Data as of {self._income_statement_asof_date} are")
+        for k, v in self._income_statement_data.items():
+            print(f"{k}: {v}")
+        print("\n\n")
+        print(f"Balance Sheet Data as of {self._balance_sheet_asof_date} are")
+        for k, v in self._balance_sheet_data.items():
+            print(f"{k}: {v}")
+        print("\n\n")
+        print(f"Cashflow Statement Data as of {self._cashflow_asof_date} are")
+        # show all data available
+        for k, v in self._cashflow_data.items():
+            print(f"{k}: {v}")
+            
+    def _get_income_statement_history(self):
+        if self.freq == 'annual':
+            key = 'incomeStatementHistory'
+        elif self.freq == 'quarterly':
+            key = 'incomeStatementHistoryQuarterly'
+
+        # keep every period, the latest one is also the default data
+        self._income_statement_history = StatementHistory(self.get_financial_stmts(self.freq, 'income')[key][self.ticker])
+        dt, data = self._income_statement_history.latest()
+        self._income_statement_asof_date = dt
+        # cashflow data is a dict
+        self._income_statement_data = data
+        
+    def _get_balance_sheet_history(self):
+        if self.freq == 'annual':
+            key = 'balanceSheetHistory'
+        elif self.freq == 'quarterly':
+            key = 'balanceSheetHistoryQuarterly'
+
+        # keep every period, the latest one is also the default data
+        self._balance_sheet_history = StatementHistory(self.get_financial_stmts(self.freq, 'balance')[key][self.ticker])
+        dt, data = self._balance_sheet_history.latest()
+        self._balance_sheet_asof_date = dt
+        # cashflow data is a dict
+        self._balance_sheet_data = data
+        
+    def _get_cashflow_statement_history(self):
+        #
+        if self.freq == 'annual':
+            key = 'cashflowStatementHistory'
+        elif self.freq == 'quarterly':
+            key = 'cashflowStatementHistoryQuarterly'
+
+        # keep every period, the latest one is also the default data
+        self._cashflow_history = StatementHistory(self.get_financial_stmts(self.freq, 'cash')[key][self.ticker])
+        dt, data = self._cashflow_history.latest()
+        self._cashflow_asof_date = dt
+        # cashflow data is a dict
+        self._cashflow_data = data
+
+def _merge_statements(responses):
+    # merge {key: {ticker: history}} responses into one
+    result = {}
+    for response in responses:
+        for key, by_ticker in (response or {}).items():
+            result.setdefault(key, {}).update(by_ticker or {})
+    return(result)
+
+def _fetch_chunk(list_of_tickers, freq, provider):
+    # statements, betas and shares outstanding of a chunk of tickers in bulk calls
+    if provider is not None:
+        if hasattr(provider, 'get_financial_stmts_many'):
+            statements = provider.get_financial_stmts_many(list_of_tickers, freq, STATEMENT_TYPES)
+        else:
+            statements = _merge_statements(provider.get_financial_stmts(ticker, freq, statement_type)
+                                           for ticker in list_of_tickers for statement_type in STATEMENT_TYPES)
+        if hasattr(provider, 'get_beta_many'):
+            beta = provider.get_beta_many(list_of_tickers)
+            shares = provider.get_num_shares_outstanding_many(list_of_tickers, 'current')
+        else:
+            beta = {ticker: provider.get_beta(ticker) for ticker in list_of_tickers}
+            shares = {ticker: provider.get_num_shares_outstanding(ticker, 'current') for ticker in list_of_tickers}
+        return(statements, beta, shares)
+
+    yfin = YahooFinancials(list_of_tickers)
+    statements = yfin.get_financial_stmts(freq, list(STATEMENT_TYPES))
+    beta = yfin.get_beta()
+    shares = yfin.get_num_shares_outstanding('current')
+    return(statements, beta if isinstance(beta, dict) else {}, shares if isinstance(shares, dict) else {})
+
+def load_many(list_of_tickers, freq = 'annual', provider = None, cache = None, refresh = False,
+              chunk_size = 50, max_workers = 4, reporting_lag_days = None):
+    '''
+    dict of ticker -> MyYahooFinancials with the latest data loaded, for many tickers at once
+
+    The statements, betas and shares outstanding of the tickers that are not in the cache are
+    retrieved chunk_size tickers per call with max_workers chunks in flight, then handed out
+    to the instance of each ticker. Tickers that cannot be loaded are reported and left out
+    '''
+    yfins = {ticker: MyYahooFinancials(ticker, freq, provider, cache, refresh, reporting_lag_days)
+             for ticker in list_of_tickers}
+    items = [(freq, statement_type) for statement_type in STATEMENT_TYPES] + \
+            [('latest', 'beta'), ('latest', 'shares_outstanding_current')]
+
+    # tickers with everything cached make no call at all
+    to_fetch = []
+    for ticker, yfin in yfins.items():
+        for item in items:
+            data = cache.get(ticker, *item) if cache is not None and not refresh else None
+            if data is None:
+                to_fetch.append(ticker)
+                break
+            yfin._prefetched[item] = data
+
+    chunks = [to_fetch[i:i + chunk_size] for i in range(0, len(to_fetch), chunk_size)]
+    def fetch(chunk):
+        try:
+            return(_fetch_chunk(chunk, freq, provider))
+        except Exception as e:
+            print(f"Failed to get financial data for {len(chunk)} tickers from {chunk[0]}: {e}")
+            return({}, {}, {})
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        for chunk, (statements, beta, shares) in zip(chunks, executor.map(fetch, chunks)):
+            for ticker in chunk:
+                yfin = yfins[ticker]
+                for statement_type in STATEMENT_TYPES:
+                    key = STATEMENT_KEYS[(statement_type, freq)]
+                    history = statements.get(key, {}).get(ticker)
+                    if history:
+                        data = {key: {ticker: history}}
+                        yfin._prefetched[(freq, statement_type)] = data
+                        if cache is not None:
+                            cache.put(ticker, freq, statement_type, data)
+                for name, values in [('beta', beta), ('shares_outstanding_current', shares)]:
+                    if ticker in values:
+                        yfin._prefetched[('latest', name)] = values[ticker]
+                        if cache is not None and values[ticker] is not None:
+                            cache.put(ticker, 'latest', name, values[ticker])
+
+    # anything the bulk calls did not return is retrieved by the ticker itself
+    loaded = {}
+    for ticker, yfin in yfins.items():
+        try:
+            yfin.load_latest_data()
+            loaded[ticker] = yfin
+        except Exception as e:
+            print(f"Failed to load financial data for {ticker}: {e}")
+    return(loaded)
+
+def _test():
+    symbol = 'AAPL'
+    freq = freq='quarterly'
+    yfinance = MyYahooFinancials(symbol, freq)
+
+    yfinance.load_latest_data()
+    
+    print(f"Getting Financial Data for {symbol} with freq {freq}\n\n")
+    
+    yfinance.print_all_data()
+    # example of how to get some of the data
+    print("Total Revenue: ", yfinance.get_income_statement_data('totalRevenue'))    
+    print("Free Cashflow: ", yfinance.get_cashflow_data('freeCashFlow'))
+
+
+if __name__ == "__main__":
+    _test()
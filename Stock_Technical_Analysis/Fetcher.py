@@ -1,135 +1,570 @@
-'''
-@project       : Temple University CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/1/2023
-
-Download daily stock price from Yahoo
-
-'''
-
-
-import os
-import pandas as pd
-import numpy as np
-import sqlite3
-
-# pip install pandas-datareader
-import pandas_datareader as pdr
-
-import yfinance as yf
-
-import option
-
-# https://www.geeksforgeeks.org/python-stock-data-visualisation/
-
-class Fetcher(object):
-
-    def __init__(self, opt, db_connection):
-        # opt is an option instance
-        self.opt = opt
-        self.db_connection = db_connection
-
-    def get_daily_from_yahoo(self, ticker, start_date, end_date):
-        # gets df of stock info between two dates
-        stock = yf.Ticker(ticker)
-        df = stock.history(start=start_date, end=end_date)
-        
-        return(df)
-
-    def download_data_to_csv(self, list_of_tickers):
-        # downloads all df for tickers from yahoo api and makes csv for each
-        
-        for ticker in list_of_tickers:
-            stock = self.get_daily_from_yahoo(ticker, self.opt.start_date, self.opt.end_date) 
-            daily = os.path.join(self.opt.output_dir, f"{ticker}_daily.csv") #specify name of csv file to store daily price data
-            stock['Ticker'] = ticker #add column 'Ticker' and fills all rows with the ticker
-            stock.to_csv(daily)
-        
-    def csv_to_table(self, csv_file_name, fields_map, db_table):
-        # insert data from a csv file to a table
-
-        df = pd.read_csv(csv_file_name)
-        if df.shape[0] <= 0:
-            return
-        # change the column header
-        df.columns = [fields_map[x] for x in df.columns]
-
-        # move ticker columns
-        new_df = df[['Ticker']]
-        for c in df.columns[:-1]:
-            new_df[c] = df[c]
-
-        ticker = os.path.basename(csv_file_name).replace('.csv','').replace("_daily", "")
-        print(ticker)
-        cursor = self.db_connection.cursor()
-
-        #turns dataframe into list of tuples
-        new_df = list(new_df.itertuples(index=False, name=None))
-
-        #insert data from dataframe into sql database
-        sql = f"INSERT INTO {db_table} (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-        cursor.executemany(sql, new_df)
-
-        self.db_connection.commit()
-        
-    def save_daily_data_to_sqlite(self, daily_file_dir, list_of_tickers):
-        # read all daily.csv files from a dir and load them into sqlite table
-        db_table = 'EquityDailyPrice'
-
-        cursor = self.db_connection.cursor()
-        sql = f"DELETE FROM {db_table}"
-        cursor.execute(sql)
-
-        fields_map = {'Date': 'AsOfDate', 'Dividends': 'Dividend', 'Stock Splits': 'StockSplits'}
-        for f in ['Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']:
-            fields_map[f] = f
-
-        for ticker in list_of_tickers:
-            file_name = os.path.join(daily_file_dir, f"{ticker}_daily.csv")
-            print(file_name)
-            self.csv_to_table(file_name, fields_map, db_table)
-
-        self.db_connection.close()
-
-def run():
-    #
-    parser = option.get_default_parser()
-    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
-    
-    args = parser.parse_args()
-    opt = option.Option(args = args)
-
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-    
-    if opt.tickers is not None:
-        list_of_tickers = opt.tickers.split(',')
-    else:
-        fname = os.path.join(opt.data_dir, "S&P500.txt")
-        list_of_tickers = list(pd.read_csv(fname, header=None).iloc[:, 0])
-        print(f"Read tickers from {fname}")
-        
-
-    print(list_of_tickers)
-    print(opt.start_date, opt.end_date)
-
-    db_file = opt.sqlite_db
-    db_connection = sqlite3.connect(db_file)
-    
-    fetcher = Fetcher(opt, db_connection)
-    print(f"Download data to {opt.data_dir} directory")
-
-    # Call the fetcher download and save_daily methods
-    if 1:
-        print(f"Download data to {opt.data_dir} directory")
-        fetcher.download_data_to_csv(list_of_tickers)
-
-    if 1:
-        # read the csv file back and save the data into sqlite database
-        fetcher.save_daily_data_to_sqlite(opt.output_dir, list_of_tickers)
-    
-if __name__ == "__main__":
-    run()
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/1/2023
+
+Download daily stock price from Yahoo
+
+'''
+
+
+import os
+import time
+import threading
+import contextlib
+import pandas as pd
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# pip install pandas-datareader
+import pandas_datareader as pdr
+
+import option
+import schema
+import adjustment
+import price_cache
+import connection
+import providers
+from manifest import RunManifest
+
+# https://www.geeksforgeeks.org/python-stock-data-visualisation/
+
+class RateLimiter(object):
+    '''
+    Thread safe limiter that spaces out calls so that no more than
+    requests_per_second calls are started in any one second
+    '''
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        if self.interval <= 0:
+            return
+        # reserve the next slot under the lock, then sleep outside of it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _local_days(index):
+    # datetime64[D] of a yahoo Date index, in the exchange time zone like the AsOfDate column
+    return(np.array(index.strftime('%Y-%m-%d').tolist(), dtype='datetime64[D]'))
+
+
+class Fetcher(object):
+
+    def __init__(self, opt, db_connection, provider = None):
+        # opt is an option instance
+        # provider is a providers.DataProvider, providers.YahooProvider by default
+        # manifest is an optional manifest.RunManifest that records the progress of the run
+        self.opt = opt
+        self.db_connection = db_connection
+        self.provider = provider if provider is not None else providers.YahooProvider()
+        self.manifest = None
+
+    def _invalidate_cache(self, ticker = None):
+        # cached price frames of a ticker, or of every ticker when None, are stale once new rows are written
+        price_cache.PRICE_CACHE.invalidate(price_cache.get_db_name(self.db_connection), ticker)
+
+    def _checkpoint(self, ticker, rows):
+        # record in the manifest that the rows of a ticker are committed
+        if self.manifest is not None:
+            self.manifest.mark_done(ticker, len(rows), rows[-1][1] if rows else None)
+
+    def _checkpoint_failures(self, failures):
+        if self.manifest is not None:
+            for ticker, e in failures.items():
+                self.manifest.mark_failed(ticker, e)
+
+    def get_daily_from_yahoo(self, ticker, start_date, end_date):
+        # gets df of stock info between two dates, with prices as traded
+        df = self.provider.get_daily_history(ticker, start_date, end_date)
+        if len(df) == 0:
+            return(self.as_traded(df))
+        return(self.as_traded(df, self.provider.get_splits(ticker)))
+
+    def as_traded(self, df, splits = None):
+        '''
+        yahoo scales prices, dividends and volume for every split up to today even when not
+        auto adjusting, whatever the end of the frame. Undo every split after each bar, so the
+        table keeps prices as traded and adjustment.py is the only place adjustments are made.
+        splits is the ticker's whole split history from the provider, a Stock Splits series on a
+        Date index. Without it only the splits inside the frame are known, which is wrong for a
+        frame that ends before a split, e.g. a backfill or an incremental update
+        '''
+        df = df.drop(columns=['Adj Close'], errors='ignore')
+        if len(df) == 0 or 'Stock Splits' not in df.columns:
+            return(df)
+        if splits is None:
+            ratio = adjustment.later_split_ratio(df['Stock Splits'].to_numpy())
+        else:
+            ratio = adjustment.split_ratio_after(_local_days(df.index), _local_days(splits.index), splits.to_numpy())
+        if (ratio == 1.0).all():
+            return(df)
+        df = df.copy()
+        for c in ['Open', 'High', 'Low', 'Close', 'Dividends']:
+            df[c] = df[c] * ratio
+        df['Volume'] = (df['Volume'] / ratio).round().astype(np.int64)
+        return(df)
+
+    def get_daily_with_retry(self, ticker, start_date, end_date, rate_limiter = None, max_retries = 3, backoff = 1.0):
+        '''
+        call get_daily_from_yahoo, retrying with exponential backoff
+        the last exception is raised once max_retries is exhausted
+        '''
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            try:
+                return(self.get_daily_from_yahoo(ticker, start_date, end_date))
+            except Exception as e:
+                if attempt >= max_retries:
+                    raise
+                delay = backoff * (2 ** attempt)
+                print(f"Retrying {ticker} in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+                attempt += 1
+
+    def _save_csv(self, ticker, stock):
+        daily = os.path.join(self.opt.output_dir, f"{ticker}_daily.csv") #specify name of csv file to store daily price data
+        stock['Ticker'] = ticker #add column 'Ticker' and fills all rows with the ticker
+        stock.to_csv(daily)
+
+    def fetch_many(self, list_of_tickers, start_dates, end_date, failures, max_workers = 1,
+                   requests_per_second = None, max_retries = 0, backoff = 1.0):
+        '''
+        generator over (ticker, df) for every ticker that downloaded successfully
+
+        start_dates maps each ticker to the first date to request. With max_workers > 1 the
+        downloads run on a bounded thread pool, requests_per_second caps the rate at which
+        requests are started across all workers and each ticker is retried up to max_retries
+        times. Results are yielded in the calling thread, so it is safe to write them to the
+        database connection. Tickers that still fail are recorded in the failures dict
+        '''
+        rate_limiter = RateLimiter(requests_per_second)
+
+        def fetch(ticker):
+            return(self.get_daily_with_retry(ticker, start_dates[ticker], end_date,
+                                             rate_limiter, max_retries, backoff))
+
+        if max_workers is None or max_workers <= 1:
+            for ticker in list_of_tickers:
+                try:
+                    df = fetch(ticker)
+                except Exception as e:
+                    failures[ticker] = e
+                    continue
+                yield ticker, df
+        else:
+            # not a with block: if the consumer stops early or raises, the queued downloads
+            # are cancelled instead of waited for
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                futures = {executor.submit(fetch, ticker): ticker for ticker in list_of_tickers}
+                for future in as_completed(futures):
+                    ticker = futures[future]
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        failures[ticker] = e
+                        continue
+                    yield ticker, df
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _print_failures(self, list_of_tickers, failures):
+        self._checkpoint_failures(failures)
+        print(f"Downloaded {len(list_of_tickers) - len(failures)} of {len(list_of_tickers)} tickers")
+        for ticker, e in failures.items():
+            print(f"Failed to download {ticker}: {e}")
+
+    def download_data_to_csv(self, list_of_tickers, max_workers = 1, requests_per_second = None, max_retries = 0, backoff = 1.0):
+        '''
+        downloads all df for tickers from yahoo api and makes csv for each
+        returns a dict of ticker -> error for the tickers that failed, see fetch_many
+        '''
+        failures = {}
+        start_dates = {ticker: self.opt.start_date for ticker in list_of_tickers}
+        for ticker, stock in self.fetch_many(list_of_tickers, start_dates, self.opt.end_date, failures,
+                                             max_workers, requests_per_second, max_retries, backoff):
+            self._save_csv(ticker, stock)
+            if self.manifest is not None:
+                self.manifest.mark_downloaded(ticker)
+
+        self._print_failures(list_of_tickers, failures)
+        return(failures)
+
+    def frame_to_rows(self, df, ticker):
+        '''
+        turn a yahoo history data frame into (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit)
+        tuples, with AsOfDate formatted as YYYY-MM-DD in the exchange time zone
+        '''
+        dates = df.index.strftime('%Y-%m-%d').tolist()
+        columns = [df[c].tolist() for c in ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']]
+        return([(ticker, d) + tuple(values) for d, *values in zip(dates, *columns)])
+
+    def get_latest_dates(self, list_of_tickers, db_table = 'EquityDailyPrice'):
+        '''
+        return a dict of ticker -> latest AsOfDate (YYYY-MM-DD) already in the table
+        tickers with no rows are left out
+        '''
+        cursor = self.db_connection.cursor()
+        latest = {}
+        for ticker, as_of_date in cursor.execute(f"SELECT Ticker, MAX(AsOfDate) FROM {db_table} GROUP BY Ticker"):
+            latest[ticker] = as_of_date[:10]
+        wanted = set(list_of_tickers)
+        return({k: v for k, v in latest.items() if k in wanted})
+
+    def upsert_rows(self, rows, db_table = 'EquityDailyPrice'):
+        # insert new bars and overwrite the ones that are already there for the same (Ticker, AsOfDate)
+        cursor = self.db_connection.cursor()
+        sql = f"""INSERT INTO {db_table} (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                  ON CONFLICT (Ticker, AsOfDate) DO UPDATE SET
+                  Open = excluded.Open, High = excluded.High, Low = excluded.Low, Close = excluded.Close,
+                  Volume = excluded.Volume, Dividend = excluded.Dividend, StockSplit = excluded.StockSplit"""
+        cursor.executemany(sql, rows)
+
+        rows_by_ticker = {}
+        for row in rows:
+            rows_by_ticker.setdefault(row[0], []).append(row)
+        # only a ticker with a new dividend or split has its older adjusted prices recomputed
+        for ticker, ticker_rows in rows_by_ticker.items():
+            adjustment.refresh_adjusted_prices(self.db_connection, ticker, ticker_rows, db_table)
+            from_date = '' if adjustment.has_events(ticker_rows) else min(row[1] for row in ticker_rows)
+            schema.record_price_change(self.db_connection, ticker, from_date)
+        self.db_connection.commit()
+        for ticker in rows_by_ticker:
+            self._invalidate_cache(ticker)
+
+    def incremental_update(self, list_of_tickers, end_date = None, max_workers = 1, requests_per_second = None,
+                           max_retries = 0, backoff = 1.0):
+        '''
+        download only the bars after the latest AsOfDate stored for each ticker and upsert them
+        the latest stored bar is fetched again so that a partial day gets corrected
+        tickers that are not in the table yet are loaded from opt.start_date
+        returns a dict of ticker -> error for the tickers that failed
+        '''
+        db_table = 'EquityDailyPrice'
+        if end_date is None:
+            end_date = self.opt.end_date
+        schema.create_schema(self.db_connection)
+
+        latest = self.get_latest_dates(list_of_tickers, db_table)
+        start_dates = {ticker: latest.get(ticker, self.opt.start_date) for ticker in list_of_tickers}
+
+        failures = {}
+        total = 0
+        for ticker, df in self.fetch_many(list_of_tickers, start_dates, end_date, failures,
+                                          max_workers, requests_per_second, max_retries, backoff):
+            rows = self.frame_to_rows(df, ticker)
+            self.upsert_rows(rows, db_table)
+            self._checkpoint(ticker, rows)
+            total += len(rows)
+            print(f"{ticker}: {len(rows)} rows from {start_dates[ticker]}")
+
+        self._print_failures(list_of_tickers, failures)
+        print(f"Upserted {total} rows into {db_table}")
+        return(failures)
+
+    @contextlib.contextmanager
+    def bulk_load_mode(self, cache_size_kb = 200000):
+        '''
+        relax durability while a bulk load is running and restore the previous settings afterwards
+        commits no longer wait for the WAL to reach the disk, so a power loss during the load can
+        lose the last batches. With the WAL journal that connection.ConnectionManager sets up it
+        cannot corrupt the database, unlike synchronous = OFF
+        '''
+        cursor = self.db_connection.cursor()
+        synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+        cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+        temp_store = cursor.execute("PRAGMA temp_store").fetchone()[0]
+
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA cache_size = -{int(cache_size_kb)}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        try:
+            yield
+        except BaseException:
+            # batches that were not committed are not recorded anywhere, drop them
+            self.db_connection.rollback()
+            raise
+        finally:
+            cursor.execute(f"PRAGMA synchronous = {synchronous}")
+            cursor.execute(f"PRAGMA cache_size = {cache_size}")
+            cursor.execute(f"PRAGMA temp_store = {temp_store}")
+
+    def frame_to_table(self, df, ticker, db_table = 'EquityDailyPrice'):
+        '''
+        replace the rows of one ticker with a downloaded data frame, without committing
+        returns the number of rows written
+        '''
+        return(self.rows_to_table(self.frame_to_rows(df, ticker), ticker, db_table))
+
+    def rows_to_table(self, rows, ticker, db_table = 'EquityDailyPrice'):
+        # replace the rows of one ticker with rows from frame_to_rows, without committing
+        cursor = self.db_connection.cursor()
+        cursor.execute(f"DELETE FROM {db_table} WHERE Ticker = ?", (ticker,))
+        sql = f"""INSERT INTO {db_table} (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit,
+                                          AdjOpen, AdjHigh, AdjLow, AdjClose, AdjVolume)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+        cursor.executemany(sql, adjustment.adjust_rows(rows))
+        schema.record_price_change(self.db_connection, ticker)
+        return(len(rows))
+
+    def download_data_to_sqlite(self, list_of_tickers, archive_csv = False, batch_size = 100000, max_workers = 1,
+                                requests_per_second = None, max_retries = 0, backoff = 1.0):
+        '''
+        download every ticker and write the data frames straight into EquityDailyPrice,
+        skipping the csv round trip. Each ticker replaces its own rows, and the transaction is
+        committed once at least batch_size rows are pending. With archive_csv the daily csv
+        files are still written to opt.output_dir
+        returns a dict of ticker -> error for the tickers that failed
+        '''
+        db_table = 'EquityDailyPrice'
+        schema.create_schema(self.db_connection)
+        failures = {}
+        start_dates = {ticker: self.opt.start_date for ticker in list_of_tickers}
+
+        pending = 0
+        pending_tickers = []
+        total = 0
+
+        def commit():
+            self.db_connection.commit()
+            for t, rows in pending_tickers:
+                self._invalidate_cache(t)
+                self._checkpoint(t, rows)
+
+        with self.bulk_load_mode():
+            for ticker, df in self.fetch_many(list_of_tickers, start_dates, self.opt.end_date, failures,
+                                              max_workers, requests_per_second, max_retries, backoff):
+                rows = self.frame_to_rows(df, ticker)
+                pending += self.rows_to_table(rows, ticker, db_table)
+                pending_tickers.append((ticker, rows))
+                if archive_csv:
+                    self._save_csv(ticker, df)
+                if pending >= batch_size:
+                    commit()
+                    total += pending
+                    pending = 0
+                    pending_tickers = []
+            commit()
+            total += pending
+
+        self._print_failures(list_of_tickers, failures)
+        print(f"Loaded {total} rows into {db_table}")
+        return(failures)
+
+    def csv_to_table(self, csv_file_name, fields_map, db_table):
+        # replace the rows of a ticker with the data from its csv file, in one transaction
+        # returns the rows inserted
+
+        df = pd.read_csv(csv_file_name)
+        if df.shape[0] <= 0:
+            return([])
+        # change the column header
+        df.columns = [fields_map[x] for x in df.columns]
+        df['AsOfDate'] = df['AsOfDate'].str[:10]
+
+        # move ticker columns
+        new_df = df[['Ticker']]
+        for c in df.columns[:-1]:
+            new_df[c] = df[c]
+
+        ticker = os.path.basename(csv_file_name).replace('.csv','').replace("_daily", "")
+        print(ticker)
+        cursor = self.db_connection.cursor()
+
+        #turns dataframe into list of tuples
+        new_df = list(new_df.itertuples(index=False, name=None))
+
+        #insert data from dataframe into sql database
+        cursor.execute(f"DELETE FROM {db_table} WHERE Ticker = ?", (ticker,))
+        sql = f"INSERT INTO {db_table} (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        cursor.executemany(sql, new_df)
+        adjustment.update_adjusted_prices(self.db_connection, ticker, db_table)
+        schema.record_price_change(self.db_connection, ticker)
+
+        self.db_connection.commit()
+        self._invalidate_cache(ticker)
+        return(new_df)
+        
+    def save_daily_data_to_sqlite(self, daily_file_dir, list_of_tickers):
+        # read all daily.csv files from a dir and load them into sqlite table
+        # each ticker is swapped in its own transaction, so the table is never left half empty
+        db_table = 'EquityDailyPrice'
+        schema.create_schema(self.db_connection)
+
+        fields_map = {'Date': 'AsOfDate', 'Dividends': 'Dividend', 'Stock Splits': 'StockSplits'}
+        for f in ['Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']:
+            fields_map[f] = f
+
+        for ticker in list_of_tickers:
+            file_name = os.path.join(daily_file_dir, f"{ticker}_daily.csv")
+            print(file_name)
+            rows = self.csv_to_table(file_name, fields_map, db_table)
+            if rows:
+                self._checkpoint(ticker, rows)
+            elif self.manifest is not None:
+                self.manifest.mark_failed(ticker, "no data in csv file")
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
+    parser.add_argument('--workers', dest = 'workers', type=int, default=1, help='number of download threads')
+    parser.add_argument('--rps', dest = 'rps', type=float, default=None, help='max requests per second')
+    parser.add_argument('--retries', dest = 'retries', type=int, default=3, help='retries per ticker')
+    parser.add_argument('--incremental', action='store_true', dest='incremental', default=False,
+                        help='only download and upsert the bars missing from the database')
+    parser.add_argument('--direct', action='store_true', dest='direct', default=False,
+                        help='write the downloaded data straight into the database instead of going through csv files')
+    parser.add_argument('--archive_csv', action='store_true', dest='archive_csv', default=False,
+                        help='with --direct, also keep the daily csv files')
+    parser.add_argument('--pipeline', action='store_true', dest='pipeline', default=False,
+                        help='stream downloads into the database through the asyncio ingestion pipeline')
+    parser.add_argument('--resume', action='store_true', dest='resume', default=False,
+                        help='skip the tickers already completed by the previous run')
+    parser.add_argument('--replay_dir', dest='replay_dir', default=None,
+                        help='serve the downloads offline from recordings in this dir, synthetic data for the others')
+    parser.add_argument('--record_dir', dest='record_dir', default=None,
+                        help='save the downloaded responses into this dir so they can be replayed')
+    parser.add_argument('--latency', dest='latency', type=float, default=0.0,
+                        help='with --replay_dir, seconds of simulated latency per request')
+    parser.add_argument('--error_rate', dest='error_rate', type=float, default=0.0,
+                        help='with --replay_dir, fraction of requests failing with an injected error')
+    
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+    
+    if opt.tickers is not None:
+        list_of_tickers = opt.tickers.split(',')
+    else:
+        fname = os.path.join(opt.data_dir, "S&P500.txt")
+        list_of_tickers = list(pd.read_csv(fname, header=None).iloc[:, 0])
+        print(f"Read tickers from {fname}")
+        
+
+    print(list_of_tickers)
+    print(opt.start_date, opt.end_date)
+
+    manager = connection.get_connection_manager(opt)
+    try:
+        manifest = fetch(opt, manager.writer(), list_of_tickers)
+        print(f"Run summary: {manifest.summary()}")
+    finally:
+        manager.close()
+
+def get_provider(opt):
+    # data provider selected on the command line
+    if getattr(opt, 'replay_dir', None) is not None:
+        provider = providers.ReplayProvider(opt.replay_dir, latency=opt.latency, error_rate=opt.error_rate)
+    else:
+        provider = providers.YahooProvider()
+    if getattr(opt, 'record_dir', None) is not None:
+        provider = providers.RecordingProvider(provider, opt.record_dir)
+    return(provider)
+
+def fetch(opt, db_connection, list_of_tickers):
+    # download the tickers in the mode selected on the command line, returns the run manifest
+    fetcher = Fetcher(opt, db_connection, get_provider(opt))
+    print(f"Download data to {opt.data_dir} directory")
+
+    if opt.incremental:
+        mode = 'incremental'
+    elif opt.pipeline:
+        mode = 'pipeline'
+    elif opt.direct:
+        mode = 'direct'
+    else:
+        mode = 'csv'
+    params = {'mode': mode, 'start_date': opt.start_date, 'end_date': opt.end_date}
+
+    manifest = RunManifest(os.path.join(opt.data_dir, "run_manifest.json"))
+    if opt.resume:
+        manifest.load()
+        if manifest.params and manifest.params != params:
+            print(f"Warning: resuming a run started with {manifest.params}")
+        list_of_tickers = manifest.pending(list_of_tickers)
+        print(f"Resuming run, {len(list_of_tickers)} tickers left")
+    else:
+        manifest.reset(params)
+    fetcher.manifest = manifest
+
+    if opt.incremental:
+        fetcher.incremental_update(list_of_tickers, max_workers=opt.workers,
+                                   requests_per_second=opt.rps, max_retries=opt.retries)
+        return(manifest)
+
+    if opt.pipeline:
+        # imported here since pipeline imports this module
+        from pipeline import IngestPipeline
+        IngestPipeline(fetcher, max_concurrency=max(opt.workers, 1), requests_per_second=opt.rps,
+                       max_retries=opt.retries).run(list_of_tickers)
+        return(manifest)
+
+    if opt.direct:
+        fetcher.download_data_to_sqlite(list_of_tickers, archive_csv=opt.archive_csv, max_workers=opt.workers,
+                                        requests_per_second=opt.rps, max_retries=opt.retries)
+        return(manifest)
+
+    # Call the fetcher download and save_daily methods
+    if 1:
+        print(f"Download data to {opt.data_dir} directory")
+        # csv files already written by a previous attempt are not downloaded again
+        to_download = [t for t in list_of_tickers if manifest.status(t) != RunManifest.DOWNLOADED]
+        failures = fetcher.download_data_to_csv(to_download, max_workers=opt.workers,
+                                                requests_per_second=opt.rps, max_retries=opt.retries)
+        # only load the tickers that were downloaded
+        list_of_tickers = [t for t in list_of_tickers if t not in failures]
+
+    if 1:
+        # read the csv file back and save the data into sqlite database
+        fetcher.save_daily_data_to_sqlite(opt.output_dir, list_of_tickers)
+
+    return(manifest)
+    
+def _test():
+    import sqlite3
+
+    # a 2:1 split on 2019-01-31: the backfill ends before it, the incremental update crosses it
+    provider = providers.ReplayProvider(splits={'SPLT': {'2019-01-31': 2.0}})
+    opt = option.Option()
+    opt.start_date, opt.end_date = '2018-10-01', '2019-01-15'
+    db_connection = sqlite3.connect(':memory:')
+    schema.create_schema(db_connection)
+    fetcher = Fetcher(opt, db_connection, provider)
+    fetcher.rows_to_table(fetcher.frame_to_rows(fetcher.get_daily_from_yahoo('SPLT', opt.start_date, opt.end_date), 'SPLT'), 'SPLT')
+    db_connection.commit()
+    fetcher.incremental_update(['SPLT'], end_date='2019-03-01')
+
+    rows = db_connection.execute("""SELECT AsOfDate, Close, AdjClose, Volume, StockSplit FROM EquityDailyPrice
+                                    WHERE Ticker = 'SPLT' AND AsOfDate BETWEEN '2019-01-28' AND '2019-02-04'
+                                    ORDER BY AsOfDate""").fetchall()
+    for row in rows:
+        print(row)
+    close = np.array([r[0] for r in db_connection.execute(
+        "SELECT Close FROM EquityDailyPrice WHERE Ticker = 'SPLT' ORDER BY AsOfDate")])
+    adj_close = np.array([r[0] for r in db_connection.execute(
+        "SELECT AdjClose FROM EquityDailyPrice WHERE Ticker = 'SPLT' ORDER BY AsOfDate")])
+    # as traded the price halves on the split day, adjusted it moves like any other day
+    print("largest close move", np.abs(np.diff(np.log(close))).max().round(3),
+          "largest adjusted close move", np.abs(np.diff(np.log(adj_close))).max().round(3))
+
+if __name__ == "__main__":
+    run()
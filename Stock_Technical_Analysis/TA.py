@@ -1,197 +1,992 @@
-'''
-@project       : Temple University CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/1/2023
-
-Technical Indicators
-
-'''
-
-import os
-import enum
-import calendar
-import math
-import pandas as pd
-import numpy as np
-import sqlite3
-import datetime
-
-from datetime import date
-#from scipy.stats import norm
-
-from math import log, exp, sqrt
-import option
-
-from stock import Stock
-
-
-class SimpleMovingAverages(object):
-    '''
-    On given a OHLCV data frame, calculate corresponding simple moving averages
-    '''
-    def __init__(self, ohlcv_df, periods):
-        self.ohlcv_df = ohlcv_df
-        self.periods = periods
-        self._sma = {}
-
-    def _calc(self, period, price_source):
-        '''
-        for a given period, calc the SMA as a pandas series from the price_source
-        which can be  open, high, low or Close
-        '''
-        result = self.ohlcv_df[price_source].rolling(window=period).mean()
-        return(result)
-        
-    def run(self, price_source = 'Close'):
-        '''
-        Calculate all the simple moving averages
-        '''
-        for period in self.periods:
-            self._sma[period] = self._calc(period, price_source)
-    
-    def get_series(self, period):
-        return(self._sma[period])
-
-    
-class ExponentialMovingAverages(object):
-    '''
-    On given a OHLCV data frame, calculate corresponding simple moving averages
-    '''
-    def __init__(self, ohlcv_df, periods):
-        self.ohlcv_df = ohlcv_df
-        self.periods = periods
-        self._ema = {}
-
-    def _calc(self, period):
-        '''
-        for a given period, calc the SMA as a pandas series
-        '''
-        result = self.ohlcv_df['Close'].ewm(span=period).mean()
-        return(result)
-        
-    def run(self):
-        '''
-        Calculate all the exponential moving averages
-        '''
-        for period in self.periods:
-            self._ema[period] = self._calc(period)
-
-    def get_series(self, period):
-        return(self._ema[period])
-
-
-class RSI(object):
-
-    def __init__(self, ohlcv_df, period = 14):
-        self.ohlcv_df = ohlcv_df
-        self.period = period
-        self.rsi = None
-
-    def get_series(self):
-        return(self.rsi)
-
-    def run(self):
-        '''
-        Calculate all RSIs
-        '''
-
-        diff = self.ohlcv_df['Close'].diff()
-        
-        # find where stock went up/down
-        gain = diff.where(diff > 0, 0)
-        loss = -diff.where(diff < 0, 0) 
-
-        # take average gain/loss
-        gain = gain.ewm(span=self.period).mean()
-        loss = loss.ewm(span=self.period).mean()
-        
-        # calculate rsi
-        rs = gain / loss
-        self.rsi = 100 - (100/(1+rs))
-
-
-class VWAP(object):
-
-    def __init__(self, ohlcv_df):
-        self.ohlcv_df = ohlcv_df
-        self.vwap = None
-
-    def get_series(self):
-        return(self.vwap)
-
-    def run(self):
-        '''
-        Calculate all VWAPs
-        '''
-        typical = (self.ohlcv_df['High'] + self.ohlcv_df['Low'] + self.ohlcv_df['Close']) / 3
-
-        # calculate numerator
-        typicalXvol = typical * self.ohlcv_df['Volume']
-        typicalXvol_sum = typicalXvol.cumsum()
-
-        # denominator
-        vol_sum = self.ohlcv_df['Volume'].cumsum()
-
-        # calculate vwap
-        self.vwap = typicalXvol_sum / vol_sum
-
-
-def _test1():
-    opt = option.Option()
-    # set default settings
-
-    # we use relative path here, you can set it with a full path
-    opt.data_dir = "./data"
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-
-    ticker = 'AAPL'
-    db_connection = sqlite3.connect(opt.sqlite_db)
-    stock = Stock(opt, db_connection, ticker)
-
-    start_date = datetime.date(2020, 1, 1)
-    end_date = datetime.date(2023, 10, 1)
-
-    #start_date = datetime.date(2015, 1, 1)
-    #end_date = datetime.date(2019, 10, 1)
-    
-    df = stock.get_daily_hist_price(start_date, end_date)
-    
-    print(df.head())
-    print(df.tail())
-    
-    periods = [9, 20, 50, 100, 200]
-    smas = SimpleMovingAverages(df, periods)
-    smas.run()
-    s1 = smas.get_series(9)
-    print("9 SMA", s1.index)
-    print("9 SMA", s1.head(10))
-    print("9 SMA", s1.tail(10))
-
-    s2 = smas.get_series(50)
-    print("50 SMA",s2.tail(10))
-
-    emas = ExponentialMovingAverages(df, periods)
-    emas.run()
-    e2 = emas.get_series(50)
-    print("50 EMA",e2.tail(10))
-    
-    rsi_indicator = RSI(df)
-    rsi_indicator.run()
-
-    print(f"RSI for {ticker} is {rsi_indicator.rsi}")
-
-    vwap_indicator = VWAP(df)
-    vwap_indicator.run()
-    vwap_1 = vwap_indicator.get_series()
-    print("Volume Weighed Average Price (VWAP)")
-    print(f"VWAP for {ticker} is {list(vwap_1.items())[-1][1]}")
-    print(vwap_indicator.vwap)
-    
-if __name__ == "__main__":
-    _test1()
-
-    
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/1/2023
+
+Technical Indicators
+
+'''
+
+import os
+import enum
+import collections
+import calendar
+import math
+import pandas as pd
+import numpy as np
+import datetime
+
+from datetime import date
+#from scipy.stats import norm
+
+from math import log, exp, sqrt
+import option
+
+from stock import Stock
+import connection
+
+
+# fields with an adjusted column in EquityDailyPrice, see adjustment.py
+ADJUSTED_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def has_adjusted(columns):
+    # True if columns include the adjusted column of every field of ADJUSTED_FIELDS they have
+    columns = set(columns)
+    return(all('Adj' + f in columns for f in ADJUSTED_FIELDS if f in columns or 'Adj' + f in columns))
+
+def price_column(field, adjusted = True, columns = None):
+    '''
+    column holding a price field: Open, High, Low and Close are read from the split and
+    dividend adjusted AdjOpen..AdjClose columns and Volume from the split adjusted AdjVolume,
+    which counts the same shares, unless adjusted is False, as traded prices and volume jump
+    at every split. Other fields are returned as they are
+    columns are the columns at hand, e.g. of a frame or the keys of a bar. When some adjusted
+    column is missing from them, as in a database from before it was added, the traded
+    fields are read instead, so adjusted prices are never mixed with traded volume
+    '''
+    if adjusted and field in ADJUSTED_FIELDS and (columns is None or has_adjusted(columns)):
+        return('Adj' + field)
+    return(field)
+
+def calc_sma_matrix(values, periods, center = True, accumulate_dtype = np.float64):
+    '''
+    simple moving averages of values for all the periods at once, as an array of
+    len(values) x len(periods), NaN until a window is full or while it holds a missing value
+
+    One cumulative sum is computed and every period is a difference of it, so more periods
+    cost almost nothing. The sum drifts with the size of what it accumulates: center
+    accumulates the distance to the first value instead of the values themselves, and
+    accumulate_dtype can be np.longdouble for more bits where the platform has them
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    reference, total, missing = _prefix_sums(values, center, accumulate_dtype)
+    result = np.full((len(values), len(periods)), np.nan)
+    for j, period in enumerate(periods):
+        result[:, j] = _window_mean(reference, total, missing, period, accumulate_dtype)
+    return(result)
+
+def _prefix_sums(values, center, accumulate_dtype):
+    # (reference, cumulative sum of deviations, cumulative count of NaN) along the first axis
+    valid = ~np.isnan(values)
+    if center:
+        first = np.argmax(valid, axis=0)
+        reference = np.take_along_axis(values, np.expand_dims(first, 0), axis=0)[0]
+        reference = np.where(valid.any(axis=0), reference, 0.0).astype(accumulate_dtype)
+    else:
+        reference = np.zeros(values.shape[1:], dtype=accumulate_dtype)
+    deviation = np.where(valid, values.astype(accumulate_dtype) - reference, accumulate_dtype(0.0))
+    start = np.zeros((1,) + values.shape[1:])
+    total = np.concatenate((start.astype(accumulate_dtype), np.cumsum(deviation, axis=0, dtype=accumulate_dtype)))
+    missing = np.concatenate((start.astype(np.int64), np.cumsum(~valid, axis=0)))
+    return(reference, total, missing)
+
+def _window_mean(reference, total, missing, period, accumulate_dtype):
+    # mean over the last period values, from the prefix sums
+    result = np.full((len(total) - 1,) + total.shape[1:], np.nan)
+    if period <= len(result):
+        mean = reference + (total[period:] - total[:-period]) / accumulate_dtype(period)
+        result[period - 1:] = np.where(missing[period:] - missing[:-period] > 0, np.nan, mean)
+    return(result)
+
+def calc_wilder_matrix(values, period):
+    '''
+    Wilder's smoothing of every column of values at once, along the first axis
+
+    The first average is the simple mean of the first period values, on row period - 1,
+    and every later one is y_t = x_t / period + (1 - 1 / period) y_t-1, run as a linear
+    filter started from that seed. Rows before the seed are NaN, as is every row of a
+    column shorter than period. The recursion cannot skip a value, so values must not be
+    missing: RSI gives it gains and losses, which never are
+
+    The filter is scipy.signal.lfilter when scipy is installed, otherwise the same
+    products one row at a time, vectorized across the columns
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    if period > len(values):
+        return(result)
+    alpha = 1.0 / period
+    decay = 1.0 - alpha
+    # cumsum adds in order, like the streaming _WilderMean
+    seed = np.cumsum(values[:period], axis=0)[-1] / period
+    result[period - 1] = seed
+    if period == len(values):
+        return(result)
+    try:
+        from scipy.signal import lfilter
+    except ImportError:
+        average = seed
+        for i in range(period, len(values)):
+            average = alpha * values[i] + decay * average
+            result[i] = average
+        return(result)
+    result[period:], _ = lfilter([alpha], [1.0, -decay], values[period:], axis=0,
+                                 zi=np.expand_dims(decay * seed, 0))
+    return(result)
+
+def calc_rsi_matrix(close, period = 14, smoothing = 'ewm'):
+    '''
+    RSI of every column of close at once, along the first axis, with the gains and losses
+    smoothed by an ewm of span period like RSI.run, or by Wilder's smoothing
+
+    A missing close counts as no gain and no loss. With Wilder's smoothing the first RSI
+    is on row period, once period changes are in the seed, and rows before are NaN
+    '''
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.full(close.shape, np.nan)
+    diff[1:] = close[1:] - close[:-1]
+    with np.errstate(invalid='ignore'):
+        gain = np.where(diff > 0, diff, 0.0)
+        loss = -np.where(diff < 0, diff, 0.0)
+    if smoothing == 'ewm':
+        columns = (len(close), -1)
+        gain = pd.DataFrame(gain.reshape(columns)).ewm(span=period).mean().to_numpy().reshape(close.shape)
+        loss = pd.DataFrame(loss.reshape(columns)).ewm(span=period).mean().to_numpy().reshape(close.shape)
+    elif smoothing == 'wilder':
+        # the first bar has no change, the seed starts on the second one
+        gain = np.concatenate((np.full(close[:1].shape, np.nan), calc_wilder_matrix(gain[1:], period)))
+        loss = np.concatenate((np.full(close[:1].shape, np.nan), calc_wilder_matrix(loss[1:], period)))
+    else:
+        raise ValueError(f"Unknown RSI smoothing {smoothing}")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return(100 - (100/(1+rs)))
+
+def calc_vwap_prefix(high, low, close, volume):
+    '''
+    the cumulative sums every VWAP is a difference of, along the first axis and with a
+    leading row of zeros: (typical price x volume, volume, count of bars missing either)
+    A missing value adds nothing to the sums, like the cumsum of VWAP.run
+    '''
+    volume = np.asarray(volume, dtype=np.float64)
+    typicalXvol = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64)
+                   + np.asarray(close, dtype=np.float64)) / 3 * volume
+    valid_pv = ~np.isnan(typicalXvol)
+    valid_v = ~np.isnan(volume)
+    start = np.zeros((1,) + volume.shape[1:])
+    pv = np.concatenate((start, np.cumsum(np.where(valid_pv, typicalXvol, 0.0), axis=0)))
+    v = np.concatenate((start, np.cumsum(np.where(valid_v, volume, 0.0), axis=0)))
+    missing = np.concatenate((start.astype(np.int64), np.cumsum(~(valid_pv & valid_v), axis=0)))
+    return(pv, v, missing)
+
+def calc_rolling_vwap(prefix, window):
+    '''
+    VWAP of the last window bars from calc_vwap_prefix, NaN until the window is full or
+    while it holds a bar with a missing value
+    '''
+    pv, v, missing = prefix
+    result = np.full((len(pv) - 1,) + pv.shape[1:], np.nan)
+    if window <= len(result):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = (pv[window:] - pv[:-window]) / (v[window:] - v[:-window])
+        result[window - 1:] = np.where(missing[window:] - missing[:-window] > 0, np.nan, vwap)
+    return(result)
+
+def calc_anchored_vwap(prefix, anchor_rows):
+    '''
+    VWAP from calc_vwap_prefix restarting at every row of anchor_rows: each bar uses the
+    last anchor at or before it, so any number of anchors is still one pass. Bars before
+    the first anchor and bars with a missing value are NaN. Anchored on the first bar
+    alone, this is VWAP.run
+    '''
+    pv, v, missing = prefix
+    n = len(pv) - 1
+    anchor_rows = np.unique(np.asarray(anchor_rows, dtype=np.int64))
+    if len(anchor_rows) == 0:
+        return(np.full((n,) + pv.shape[1:], np.nan))
+    position = np.searchsorted(anchor_rows, np.arange(n), side='right') - 1
+    base = anchor_rows[np.maximum(position, 0)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = (pv[1:] - pv[base]) / (v[1:] - v[base])
+    skip = (position < 0).reshape((-1,) + (1,) * (pv.ndim - 1)) | (missing[1:] - missing[:-1] > 0)
+    return(np.where(skip, np.nan, vwap))
+
+def _date_rows(dates, anchor_dates):
+    # row of the first of dates on or after each anchor date
+    days = pd.to_datetime(pd.Index(dates)).values.astype('datetime64[D]')
+    anchors = pd.to_datetime(pd.Index(anchor_dates)).values.astype('datetime64[D]')
+    return(np.searchsorted(days, anchors, side='left'))
+
+
+class _PrefixSMA(object):
+    '''
+    Streaming state of calc_sma_matrix: the running sum and the last sums of the longest
+    window, so every value it returns is equal to the batch one, bit for bit
+    '''
+    def __init__(self, periods, center = True, accumulate_dtype = np.float64):
+        self.periods = list(periods)
+        self.center = center
+        self.accumulate_dtype = accumulate_dtype
+        self.reference = None
+        self.total = accumulate_dtype(0.0)
+        self.missing = 0
+        # (running sum, missing count) before each of the last max(periods) values
+        self._history = collections.deque([(self.total, 0)], maxlen=max(self.periods) + 1)
+
+    def get_state(self):
+        # json friendly copy of the state, exact for a float64 accumulator
+        return({'reference': None if self.reference is None else float(self.reference),
+                'total': float(self.total), 'missing': self.missing,
+                'history': [[float(total), missing] for total, missing in self._history]})
+
+    def set_state(self, state):
+        dtype = self.accumulate_dtype
+        self.reference = None if state['reference'] is None else dtype(state['reference'])
+        self.total = dtype(state['total'])
+        self.missing = state['missing']
+        self._history.clear()
+        self._history.extend((dtype(total), missing) for total, missing in state['history'])
+
+    def update(self, value):
+        value = float(value)
+        if value == value:
+            if self.reference is None:
+                self.reference = self.accumulate_dtype(value if self.center else 0.0)
+            self.total = self.total + (self.accumulate_dtype(value) - self.reference)
+        else:
+            self.missing += 1
+        self._history.append((self.total, self.missing))
+
+        result = {}
+        for period in self.periods:
+            if period >= len(self._history):
+                result[period] = np.nan
+                continue
+            total, missing = self._history[-1 - period]
+            if self.missing - missing > 0:
+                result[period] = np.nan
+            else:
+                result[period] = float(self.reference + (self.total - total) / self.accumulate_dtype(period))
+        return(result)
+
+
+class _EwmMean(object):
+    '''
+    Streaming state of series.ewm(span).mean(), the adjusted weights recursion pandas runs,
+    so every value it returns is equal to the batch one, bit for bit
+    '''
+    def __init__(self, span):
+        com = (span - 1) / 2.0
+        self.old_wt_factor = 1.0 - 1.0 / (1.0 + com)
+        self.weighted = None
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def get_state(self):
+        return({'weighted': self.weighted, 'old_wt': self.old_wt, 'nobs': self.nobs})
+
+    def set_state(self, state):
+        self.weighted = state['weighted']
+        self.old_wt = state['old_wt']
+        self.nobs = state['nobs']
+
+    def update(self, value):
+        value = float(value)
+        is_observation = value == value
+        self.nobs += is_observation
+        if self.weighted is None:
+            self.weighted = value
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                # avoid rounding errors on constant series
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + value) / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif is_observation:
+            self.weighted = value
+        return(self.weighted if self.nobs >= 1 else np.nan)
+
+
+class _WilderMean(object):
+    '''
+    Streaming state of calc_wilder_matrix, the same seed and the same products as the
+    filter, so every value it returns is equal to the batch one, bit for bit
+    '''
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 1.0 / period
+        self.decay = 1.0 - self.alpha
+        self.count = 0
+        self.total = 0.0
+        self.average = np.nan
+
+    def get_state(self):
+        return({'count': self.count, 'total': self.total, 'average': self.average})
+
+    def set_state(self, state):
+        self.count = state['count']
+        self.total = state['total']
+        self.average = state['average']
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        if self.count < self.period:
+            self.total += value
+        elif self.count == self.period:
+            self.total += value
+            self.average = self.total / self.period
+        else:
+            self.average = self.alpha * value + self.decay * self.average
+        return(self.average)
+
+
+def _replay(states, values):
+    # bring streaming states up to date with the history they continue
+    for value in values:
+        for state in states:
+            state.update(value)
+
+
+class SimpleMovingAverages(object):
+    '''
+    On given a OHLCV data frame, calculate corresponding simple moving averages
+    ohlcv_df can also be an ohlcv.OHLCV container, as for all the indicators below
+    center and accumulate_dtype are the precision controls of calc_sma_matrix
+    adjusted reads the adjusted prices, see price_column, as for all the indicators below
+    '''
+    def __init__(self, ohlcv_df, periods, center = True, accumulate_dtype = np.float64, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.periods = periods
+        self.center = center
+        self.accumulate_dtype = accumulate_dtype
+        self.adjusted = adjusted
+        self._sma = {}
+        self._matrix = None
+        self._state = None
+        # resolved from the columns of ohlcv_df or of the first bar, see price_column
+        self._price_source = None
+
+    def _calc(self, period, price_source):
+        '''
+        for a given period, calc the SMA as a pandas series from the price_source
+        which can be any price column, e.g. AdjClose or Close
+        '''
+        prices = self.ohlcv_df[price_source]
+        result = calc_sma_matrix(prices, [period], self.center, self.accumulate_dtype)[:, 0]
+        return(pd.Series(result, index=prices.index, name=prices.name))
+        
+    def run(self, price_source = None):
+        '''
+        Calculate all the simple moving averages in one pass over the prices
+        price_source is the close by default, adjusted unless the instance is not
+        '''
+        if price_source is None:
+            price_source = price_column('Close', self.adjusted, self.ohlcv_df.columns)
+        self._price_source = price_source
+        prices = self.ohlcv_df[price_source]
+        self._matrix = calc_sma_matrix(prices, self.periods, self.center, self.accumulate_dtype)
+        for j, period in enumerate(self.periods):
+            self._sma[period] = pd.Series(self._matrix[:, j], index=prices.index, name=prices.name)
+    
+    def get_series(self, period):
+        return(self._sma[period])
+
+    def get_matrix(self):
+        # all the SMAs as one array of dates x periods, in the order of periods
+        return(self._matrix)
+
+    def update(self, bar):
+        '''
+        streaming mode: the SMAs after one more bar, as a dict of period -> value, in constant time
+        bar is anything indexed by column name, e.g. a dict or a row of a data frame. The first
+        call replays ohlcv_df, if any, so the values continue the batch series exactly
+        '''
+        if self._state is None:
+            self._init_state()
+        if self._price_source is None:
+            self._price_source = price_column('Close', self.adjusted, bar.keys())
+        return(self._state.update(bar[self._price_source]))
+
+    def _init_state(self):
+        self._state = _PrefixSMA(self.periods, self.center, self.accumulate_dtype)
+        if self.ohlcv_df is not None:
+            if self._price_source is None:
+                self._price_source = price_column('Close', self.adjusted, self.ohlcv_df.columns)
+            _replay([self._state], np.asarray(self.ohlcv_df[self._price_source], dtype=np.float64))
+
+    def get_state(self):
+        # streaming state after the last bar, json friendly, see set_state
+        if self._state is None:
+            self._init_state()
+        return(self._state.get_state())
+
+    def set_state(self, state):
+        # continue from a state saved by get_state instead of replaying ohlcv_df
+        self._state = _PrefixSMA(self.periods, self.center, self.accumulate_dtype)
+        self._state.set_state(state)
+
+    
+class ExponentialMovingAverages(object):
+    '''
+    On given a OHLCV data frame, calculate corresponding simple moving averages
+    '''
+    def __init__(self, ohlcv_df, periods, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.periods = periods
+        self.adjusted = adjusted
+        # resolved from the columns of ohlcv_df or of the first bar, see price_column
+        self._close = None
+        self._ema = {}
+        self._state = None
+
+    def _calc(self, period):
+        '''
+        for a given period, calc the SMA as a pandas series
+        '''
+        result = self.ohlcv_df[price_column('Close', self.adjusted, self.ohlcv_df.columns)].ewm(span=period).mean()
+        return(result)
+        
+    def run(self):
+        '''
+        Calculate all the exponential moving averages
+        '''
+        for period in self.periods:
+            self._ema[period] = self._calc(period)
+
+    def get_series(self, period):
+        return(self._ema[period])
+
+    def update(self, bar):
+        '''
+        streaming mode: the EMAs after one more bar, as a dict of period -> value, see SimpleMovingAverages.update
+        '''
+        if self._state is None:
+            self._init_state()
+        if self._close is None:
+            self._close = price_column('Close', self.adjusted, bar.keys())
+        value = bar[self._close]
+        return({period: state.update(value) for period, state in self._state.items()})
+
+    def _init_state(self):
+        self._state = {period: _EwmMean(period) for period in self.periods}
+        if self.ohlcv_df is not None:
+            self._close = price_column('Close', self.adjusted, self.ohlcv_df.columns)
+            _replay(self._state.values(), np.asarray(self.ohlcv_df[self._close], dtype=np.float64))
+
+    def get_state(self):
+        if self._state is None:
+            self._init_state()
+        return({str(period): state.get_state() for period, state in self._state.items()})
+
+    def set_state(self, state):
+        self._state = {period: _EwmMean(period) for period in self.periods}
+        for period, ewm_state in self._state.items():
+            ewm_state.set_state(state[str(period)])
+
+
+class RSI(object):
+    '''
+    smoothing is 'ewm' for the exponential mean of span period of the gains and losses, or
+    'wilder' for Wilder's original smoothing, see calc_rsi_matrix
+    '''
+    def __init__(self, ohlcv_df, period = 14, smoothing = 'ewm', adjusted = True):
+        if smoothing not in ('ewm', 'wilder'):
+            raise ValueError(f"Unknown RSI smoothing {smoothing}")
+        self.ohlcv_df = ohlcv_df
+        self.period = period
+        self.smoothing = smoothing
+        self.adjusted = adjusted
+        # resolved from the columns of ohlcv_df or of the first bar, see price_column
+        self._close = None
+        self.rsi = None
+        self._state = None
+
+    def get_series(self):
+        return(self.rsi)
+
+    def update(self, bar):
+        '''
+        streaming mode: the RSI after one more bar, see SimpleMovingAverages.update
+        '''
+        if self._state is None:
+            self._init_state()
+        if self._close is None:
+            self._close = price_column('Close', self.adjusted, bar.keys())
+        return(self._update(bar[self._close]))
+
+    def _new_state(self):
+        if self.smoothing == 'wilder':
+            return((_WilderMean(self.period), _WilderMean(self.period)))
+        return((_EwmMean(self.period), _EwmMean(self.period)))
+
+    def _init_state(self):
+        self._state = self._new_state()
+        self._prev_close = np.nan
+        self._bars = 0
+        if self.ohlcv_df is not None:
+            self._close = price_column('Close', self.adjusted, self.ohlcv_df.columns)
+            for close in np.asarray(self.ohlcv_df[self._close], dtype=np.float64):
+                self._update(close)
+
+    def get_state(self):
+        if self._state is None:
+            self._init_state()
+        return({'prev_close': self._prev_close, 'bars': self._bars,
+                'gain': self._state[0].get_state(), 'loss': self._state[1].get_state()})
+
+    def set_state(self, state):
+        self._state = self._new_state()
+        self._state[0].set_state(state['gain'])
+        self._state[1].set_state(state['loss'])
+        self._prev_close = state['prev_close']
+        # states stored before the wilder smoothing only ever follow their first bar
+        self._bars = state.get('bars', 1)
+
+    def _update(self, close):
+        close = float(close)
+        diff = close - self._prev_close
+        self._prev_close = close
+        self._bars += 1
+        if self.smoothing == 'wilder' and self._bars == 1:
+            # the first bar has no change, the wilder seed starts on the second one
+            return(np.nan)
+        # same as the where calls of run, a missing diff counts as no gain and no loss
+        gain = diff if diff > 0 else 0.0
+        loss = -(diff if diff < 0 else 0.0)
+        gain = np.float64(self._state[0].update(gain))
+        loss = np.float64(self._state[1].update(loss))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = gain / loss
+            return(float(100 - (100/(1+rs))))
+
+    def run(self):
+        '''
+        Calculate all RSIs
+        '''
+        close = self.ohlcv_df[price_column('Close', self.adjusted, self.ohlcv_df.columns)]
+        if self.smoothing == 'wilder':
+            self.rsi = pd.Series(calc_rsi_matrix(close, self.period, 'wilder'), index=close.index, name=close.name)
+            return
+
+        diff = close.diff()
+        
+        # find where stock went up/down
+        gain = diff.where(diff > 0, 0)
+        loss = -diff.where(diff < 0, 0) 
+
+        # take average gain/loss
+        gain = gain.ewm(span=self.period).mean()
+        loss = loss.ewm(span=self.period).mean()
+        
+        # calculate rsi
+        rs = gain / loss
+        self.rsi = 100 - (100/(1+rs))
+
+
+class VWAP(object):
+    '''
+    run gives the VWAP from the first bar of ohlcv_df, get_rolling and get_anchored the
+    VWAP over the last N bars and from anchor dates. These share one set of cumulative
+    sums, so asking for many windows or anchors costs one pass over the bars each
+    '''
+    def __init__(self, ohlcv_df, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        self.adjusted = adjusted
+        # high, low, close and volume columns, resolved from the columns of ohlcv_df or of the
+        # first bar, see price_column
+        self._columns = None
+        self.vwap = None
+        self._state = None
+        self._prefix = None
+
+    def get_series(self):
+        return(self.vwap)
+
+    def _resolve(self, columns):
+        if self._columns is None:
+            self._columns = [price_column(c, self.adjusted, columns) for c in ['High', 'Low', 'Close', 'Volume']]
+        return(self._columns)
+
+    def _get_prefix(self):
+        if self._prefix is None:
+            self._prefix = calc_vwap_prefix(*(self.ohlcv_df[c] for c in self._resolve(self.ohlcv_df.columns)))
+        return(self._prefix)
+
+    def _to_series(self, values):
+        close = self.ohlcv_df[self._resolve(self.ohlcv_df.columns)[2]]
+        return(pd.Series(values, index=close.index, name='VWAP'))
+
+    def get_rolling(self, window):
+        '''
+        VWAP of the last window bars, see calc_rolling_vwap
+        '''
+        return(self._to_series(calc_rolling_vwap(self._get_prefix(), window)))
+
+    def get_anchored(self, anchor_dates):
+        '''
+        VWAP from the first bar on or after each of anchor_dates, e.g. earnings dates,
+        restarting at every anchor and NaN before the first one, see calc_anchored_vwap
+        '''
+        rows = _date_rows(self.ohlcv_df[self._resolve(self.ohlcv_df.columns)[2]].index, anchor_dates)
+        return(self._to_series(calc_anchored_vwap(self._get_prefix(), rows)))
+
+    def update(self, bar):
+        '''
+        streaming mode: the VWAP after one more bar, see SimpleMovingAverages.update
+        '''
+        if self._state is None:
+            self._init_state()
+        return(self._update(*(bar[c] for c in self._resolve(bar.keys()))))
+
+    def _init_state(self):
+        self._state = [0.0, 0]
+        if self.ohlcv_df is not None:
+            for high, low, close, volume in zip(*(self.ohlcv_df[c].tolist() for c in self._resolve(self.ohlcv_df.columns))):
+                self._update(high, low, close, volume)
+
+    def get_state(self):
+        if self._state is None:
+            self._init_state()
+        # numpy scalars from data frame rows are turned into python numbers for json
+        typicalXvol_sum, vol_sum = (x.item() if isinstance(x, np.generic) else x for x in self._state)
+        return({'typicalXvol_sum': typicalXvol_sum, 'vol_sum': vol_sum})
+
+    def set_state(self, state):
+        self._state = [state['typicalXvol_sum'], state['vol_sum']]
+
+    def _update(self, high, low, close, volume):
+        # running sums of typical price x volume and of volume, skipping missing values like cumsum
+        typicalXvol = (high + low + close) / 3 * volume
+        if typicalXvol == typicalXvol:
+            self._state[0] += typicalXvol
+        if volume == volume:
+            self._state[1] += volume
+        if typicalXvol != typicalXvol or volume != volume:
+            return(np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return(float(np.float64(self._state[0]) / self._state[1]))
+
+    def run(self):
+        '''
+        Calculate all VWAPs
+        '''
+        high, low, close, volume = (self.ohlcv_df[c] for c in self._resolve(self.ohlcv_df.columns))
+        typical = (high + low + close) / 3
+
+        # calculate numerator
+        typicalXvol = typical * volume
+        typicalXvol_sum = typicalXvol.cumsum()
+
+        # denominator
+        vol_sum = volume.cumsum()
+
+        # calculate vwap
+        self.vwap = typicalXvol_sum / vol_sum
+
+
+_CLOSE = ('column', 'Close')
+
+# indicator name -> the graph node computing it, given the indicator parameters
+INDICATORS = {
+    'sma': lambda period: ('sma', _CLOSE, period),
+    'ema': lambda period: ('ema', _CLOSE, period),
+    'rsi': lambda period = 14, smoothing = 'ewm': ('rsi', _CLOSE, period, smoothing),
+    'vwap': lambda: ('vwap',),
+    'rolling_vwap': lambda window: ('rolling_vwap', window),
+    'anchored_vwap': lambda *anchor_dates: ('anchored_vwap', tuple(anchor_dates)),
+    'macd': lambda fast = 12, slow = 26, signal = 9: ('macd', _CLOSE, fast, slow, signal),
+    'bollinger': lambda period = 20, width = 2: ('bollinger', _CLOSE, period, width),
+    'atr': lambda period = 14: ('atr', period),
+}
+
+
+class IndicatorGraph(object):
+    '''
+    Indicators of one ohlcv_df computed from a graph of shared, memoized intermediates
+
+    A node is a tuple (operation, *arguments) whose arguments can be other nodes, e.g.
+    ('ema', ('column', 'Close'), 12). Every node is computed at most once, so MACD reuses the
+    EMAs, Bollinger bands reuse the SMA and asking for a set of indicators only evaluates
+    the nodes they need. Results are the same as the indicator classes above. Column nodes
+    name the price fields, which are read from the adjusted columns, see price_column
+    '''
+    def __init__(self, ohlcv_df, adjusted = True):
+        self.ohlcv_df = ohlcv_df
+        # a frame without the adjusted columns is read as traded, see price_column
+        self.adjusted = adjusted and has_adjusted(ohlcv_df.columns)
+        self._values = {}
+        # nodes in the order they were computed
+        self.evaluated = []
+
+    def evaluate(self, node):
+        if node not in self._values:
+            self._values[node] = getattr(self, '_' + node[0])(*node[1:])
+            self.evaluated.append(node)
+        return(self._values[node])
+
+    def get(self, name, *params):
+        # one indicator, e.g. get('rsi', 14)
+        return(self.evaluate(INDICATORS[name](*params)))
+
+    def run(self, indicators):
+        '''
+        indicators is a list of names or (name, *params) tuples such as 'vwap', ('sma', 50)
+        or ('macd', 12, 26, 9), returns a dict of each of them -> series or frame
+        '''
+        result = {}
+        for spec in indicators:
+            name, params = (spec, ()) if isinstance(spec, str) else (spec[0], spec[1:])
+            result[spec] = self.get(name, *params)
+        return(result)
+
+    # inputs and shared intermediates
+    def _column(self, name):
+        return(self.ohlcv_df[price_column(name, self.adjusted)])
+
+    def _diff(self, source):
+        return(self.evaluate(source).diff())
+
+    def _previous(self, source):
+        return(self.evaluate(source).shift(1))
+
+    def _gain(self, source):
+        diff = self.evaluate(('diff', source))
+        return(diff.where(diff > 0, 0))
+
+    def _loss(self, source):
+        diff = self.evaluate(('diff', source))
+        return(-diff.where(diff < 0, 0))
+
+    def _ema(self, source, period):
+        return(self.evaluate(source).ewm(span=period).mean())
+
+    def _wilder(self, source, period, start = 0):
+        # calc_wilder_matrix of source from row start on, NaN before
+        values = self.evaluate(source)
+        result = np.full(len(values), np.nan)
+        result[start:] = calc_wilder_matrix(values.to_numpy(dtype=np.float64)[start:], period)
+        return(pd.Series(result, index=values.index, name=values.name))
+
+    def _prefix(self, source):
+        return(_prefix_sums(np.asarray(self.evaluate(source), dtype=np.float64), True, np.float64))
+
+    def _std(self, source, period):
+        return(self.evaluate(source).rolling(window=period).std())
+
+    def _cumsum(self, source):
+        return(self.evaluate(source).cumsum())
+
+    def _typical(self):
+        return((self.evaluate(('column', 'High')) + self.evaluate(('column', 'Low')) + self.evaluate(_CLOSE)) / 3)
+
+    def _typicalXvol(self):
+        return(self.evaluate(('typical',)) * self.evaluate(('column', 'Volume')))
+
+    def _true_range(self):
+        high, low = self.evaluate(('column', 'High')), self.evaluate(('column', 'Low'))
+        previous = self.evaluate(('previous', _CLOSE))
+        # fmax skips the missing previous close of the first bar
+        return(np.fmax(np.fmax(high - low, (high - previous).abs()), (low - previous).abs()))
+
+    def _vwap_prefix(self):
+        return(calc_vwap_prefix(*(self.evaluate(('column', c)) for c in ['High', 'Low', 'Close', 'Volume'])))
+
+    def _macd_line(self, source, fast, slow):
+        return(self.evaluate(('ema', source, fast)) - self.evaluate(('ema', source, slow)))
+
+    # indicators
+    def _sma(self, source, period):
+        prices = self.evaluate(source)
+        reference, total, missing = self.evaluate(('prefix', source))
+        return(pd.Series(_window_mean(reference, total, missing, period, np.float64), index=prices.index, name=prices.name))
+
+    def _rsi(self, source, period, smoothing):
+        if smoothing == 'wilder':
+            # the first bar has no change, the seed starts on the second one as in calc_rsi_matrix
+            rs = self.evaluate(('wilder', ('gain', source), period, 1)) / self.evaluate(('wilder', ('loss', source), period, 1))
+            return(100 - (100/(1+rs)))
+        rs = self.evaluate(('ema', ('gain', source), period)) / self.evaluate(('ema', ('loss', source), period))
+        return(100 - (100/(1+rs)))
+
+    def _vwap(self):
+        return(self.evaluate(('cumsum', ('typicalXvol',))) / self.evaluate(('cumsum', ('column', 'Volume'))))
+
+    def _rolling_vwap(self, window):
+        index = self.evaluate(_CLOSE).index
+        return(pd.Series(calc_rolling_vwap(self.evaluate(('vwap_prefix',)), window), index=index, name='VWAP'))
+
+    def _anchored_vwap(self, anchor_dates):
+        index = self.evaluate(_CLOSE).index
+        values = calc_anchored_vwap(self.evaluate(('vwap_prefix',)), _date_rows(index, anchor_dates))
+        return(pd.Series(values, index=index, name='VWAP'))
+
+    def _macd(self, source, fast, slow, signal):
+        line = ('macd_line', source, fast, slow)
+        macd = self.evaluate(line)
+        signal_line = self.evaluate(('ema', line, signal))
+        return(pd.DataFrame({'MACD': macd, 'Signal': signal_line, 'Histogram': macd - signal_line}))
+
+    def _bollinger(self, source, period, width):
+        middle = self.evaluate(('sma', source, period))
+        std = self.evaluate(('std', source, period))
+        return(pd.DataFrame({'Middle': middle, 'Upper': middle + width * std, 'Lower': middle - width * std}))
+
+    def _atr(self, period):
+        # average true range with Wilder's smoothing
+        return(self.evaluate(('wilder', ('true_range',), period)))
+
+
+class UniverseIndicators(object):
+    '''
+    The indicators above for every ticker of a stock.PricePanel at once
+
+    A panel has NaN wherever a ticker has no bar, before its first bar and on the dates it
+    is missing. Each column is compressed to the ticker's own bars, the indicator runs on the
+    whole dates x tickers array in one vectorized pass, and the result is scattered back
+    to the panel dates, so every ticker gets exactly what the single ticker class computes
+    on its own history. mask tells which cells hold a bar, by default where Close is present.
+    Price fields are read from the adjusted ones of the panel, see price_column
+    '''
+    def __init__(self, panel, mask = None, adjusted = True):
+        self.panel = panel
+        # a panel without the adjusted fields is read as traded, see price_column
+        self.adjusted = adjusted and has_adjusted(panel.fields)
+        self.mask = mask if mask is not None else ~np.isnan(self._field('Close'))
+        # rows of each column reordered so that its bars come first, in date order
+        self._order = np.argsort(~self.mask, axis=0, kind='stable')
+        self._filled = np.arange(len(self.mask))[:, None] < self.mask.sum(axis=0)
+
+    def _field(self, field):
+        return(self.panel.get_field(price_column(field, self.adjusted)))
+
+    def _compress(self, field):
+        values = np.take_along_axis(self._field(field), self._order, axis=0)
+        return(np.where(self._filled, values, np.nan))
+
+    def _expand(self, values):
+        result = np.empty(values.shape)
+        np.put_along_axis(result, self._order, np.asarray(values, dtype=np.float64), axis=0)
+        result[~self.mask] = np.nan
+        return(result)
+
+    def _frame(self, field):
+        return(pd.DataFrame(self._compress(field), columns=self.panel.tickers))
+
+    def sma(self, periods, price_source = 'Close', center = True, accumulate_dtype = np.float64):
+        # dict of period -> dates x tickers array of SimpleMovingAverages
+        reference, total, missing = _prefix_sums(self._compress(price_source), center, accumulate_dtype)
+        return({period: self._expand(_window_mean(reference, total, missing, period, accumulate_dtype))
+                for period in periods})
+
+    def ema(self, periods):
+        # dict of period -> dates x tickers array of ExponentialMovingAverages
+        close = self._frame('Close')
+        return({period: self._expand(close.ewm(span=period).mean().to_numpy()) for period in periods})
+
+    def rsi(self, period = 14, smoothing = 'ewm'):
+        # dates x tickers array of RSI, same steps as RSI.run
+        if smoothing == 'wilder':
+            return(self._expand(calc_rsi_matrix(self._compress('Close'), period, 'wilder')))
+        diff = self._frame('Close').diff()
+        gain = diff.where(diff > 0, 0)
+        loss = -diff.where(diff < 0, 0)
+        gain = gain.ewm(span=period).mean()
+        loss = loss.ewm(span=period).mean()
+        rs = gain / loss
+        return(self._expand((100 - (100/(1+rs))).to_numpy()))
+
+    def vwap(self):
+        # dates x tickers array of VWAP, same steps as VWAP.run
+        typical = (self._frame('High') + self._frame('Low') + self._frame('Close')) / 3
+        volume = self._frame('Volume')
+        return(self._expand(((typical * volume).cumsum() / volume.cumsum()).to_numpy()))
+
+    def rolling_vwap(self, windows):
+        # dict of window -> dates x tickers array of VWAP.get_rolling, over each ticker's own bars
+        prefix = calc_vwap_prefix(*(self._compress(c) for c in ['High', 'Low', 'Close', 'Volume']))
+        return({window: self._expand(calc_rolling_vwap(prefix, window)) for window in windows})
+
+    def anchored_vwap(self, anchor_dates):
+        # dates x tickers array of VWAP.get_anchored, the same anchor dates for every ticker
+        # the dates a ticker has no bar add nothing to the sums, so this needs no compression
+        fields = (np.where(self.mask, self._field(c), np.nan) for c in ['High', 'Low', 'Close', 'Volume'])
+        values = calc_anchored_vwap(calc_vwap_prefix(*fields), _date_rows(self.panel.dates, anchor_dates))
+        values[~self.mask] = np.nan
+        return(values)
+
+    def to_frame(self, values):
+        # a dates x tickers result as a data frame
+        return(pd.DataFrame(values, index=pd.Index(self.panel.dates, name='Date'), columns=self.panel.tickers))
+
+
+def _test1():
+    opt = option.Option()
+    # set default settings
+
+    # we use relative path here, you can set it with a full path
+    opt.data_dir = "./data"
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    ticker = 'AAPL'
+    manager = connection.get_connection_manager(opt)
+    stock = Stock(opt, manager, ticker)
+
+    start_date = datetime.date(2020, 1, 1)
+    end_date = datetime.date(2023, 10, 1)
+
+    #start_date = datetime.date(2015, 1, 1)
+    #end_date = datetime.date(2019, 10, 1)
+    
+    df = stock.get_daily_hist_price(start_date, end_date)
+    
+    print(df.head())
+    print(df.tail())
+    
+    periods = [9, 20, 50, 100, 200]
+    smas = SimpleMovingAverages(df, periods)
+    smas.run()
+    s1 = smas.get_series(9)
+    print("9 SMA", s1.index)
+    print("9 SMA", s1.head(10))
+    print("9 SMA", s1.tail(10))
+
+    s2 = smas.get_series(50)
+    print("50 SMA",s2.tail(10))
+
+    emas = ExponentialMovingAverages(df, periods)
+    emas.run()
+    e2 = emas.get_series(50)
+    print("50 EMA",e2.tail(10))
+    
+    rsi_indicator = RSI(df)
+    rsi_indicator.run()
+
+    print(f"RSI for {ticker} is {rsi_indicator.rsi}")
+
+    wilder_rsi = RSI(df, smoothing='wilder')
+    wilder_rsi.run()
+    print(f"Wilder RSI for {ticker} is {wilder_rsi.rsi}")
+
+    vwap_indicator = VWAP(df)
+    vwap_indicator.run()
+    vwap_1 = vwap_indicator.get_series()
+    print("Volume Weighed Average Price (VWAP)")
+    print(f"VWAP for {ticker} is {list(vwap_1.items())[-1][1]}")
+    print(vwap_indicator.vwap)
+    print("20 bar VWAP", vwap_indicator.get_rolling(20).tail())
+    # anchored on the first bar after the Q3 earnings
+    print("Anchored VWAP", vwap_indicator.get_anchored(['2023-08-04']).tail())
+
+    # a full panel from the shared intermediates of the indicator graph
+    graph = IndicatorGraph(df)
+    panel = graph.run([('sma', 50), ('ema', 12), ('ema', 26), ('rsi', 14), 'vwap', ('macd', 12, 26, 9),
+                       ('bollinger', 20, 2), ('atr', 14)])
+    print(f"{len(panel)} indicators from {len(graph.evaluated)} nodes")
+    print(panel[('macd', 12, 26, 9)].tail())
+
+    # streaming mode: continue from all but the last 5 bars, one bar at a time
+    live_rsi = RSI(df.iloc[:-5])
+    for day, bar in df.iloc[-5:].iterrows():
+        print(f"{day} streaming RSI {live_rsi.update(bar)} batch RSI {rsi_indicator.rsi[day]}")
+    manager.close()
+    
+if __name__ == "__main__":
+    _test1()
+
+    
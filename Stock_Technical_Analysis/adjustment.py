@@ -0,0 +1,143 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Split and dividend adjustment of daily prices
+
+The EquityDailyPrice table stores prices as traded together with the Dividend and StockSplit
+of each day. The adjusted columns AdjOpen, AdjHigh, AdjLow and AdjClose scale every bar by
+the product of the adjustment factors of all the events after it, where the event on day t
+has the factor
+
+    (1 - Dividend_t / Close_t-1) / StockSplit_t
+
+AdjVolume scales the Volume of every bar by the splits after it, so that it counts today's
+shares like the adjusted prices and their product stays the traded dollar volume
+
+'''
+
+import numpy as np
+
+
+def _split_ratio(split):
+    # yahoo reports no split as 0, treat it and missing values as a ratio of 1
+    split = np.asarray(split, dtype=np.float64)
+    return(np.where(np.isfinite(split) & (split > 0), split, 1.0))
+
+def later_split_ratio(split):
+    '''
+    product of the split ratios strictly after each bar, i.e. how many of today's shares one
+    share of that day became
+    '''
+    ratio = _split_ratio(split)
+    if len(ratio) == 0:
+        return(ratio)
+    after = np.cumprod(ratio[::-1])[::-1]
+    return(np.append(after[1:], 1.0))
+
+def split_ratio_after(days, split_days, split):
+    '''
+    product of the ratios of the splits strictly after each of days, where days and
+    split_days are datetime64[D] arrays and split the ratio of each split. Unlike
+    later_split_ratio the splits need not fall inside the bars, e.g. the whole split history
+    '''
+    split_days = np.asarray(split_days, dtype='datetime64[D]')
+    ratio = _split_ratio(split)
+    order = np.argsort(split_days, kind='stable')
+    split_days, ratio = split_days[order], ratio[order]
+    # after[k] is the product of the ratios of the splits from the k-th on
+    after = np.append(np.cumprod(ratio[::-1])[::-1], 1.0)
+    return(after[np.searchsorted(split_days, np.asarray(days, dtype='datetime64[D]'), side='right')])
+
+def calc_adjustment_factors(close, dividend, split):
+    '''
+    cumulative adjustment factor of every bar, computed as a reverse cumulative product of
+    the event factors so the whole history takes one vectorized pass
+    '''
+    close = np.asarray(close, dtype=np.float64)
+    dividend = np.nan_to_num(np.asarray(dividend, dtype=np.float64))
+    n = len(close)
+    if n == 0:
+        return(np.ones(0))
+
+    prev_close = np.empty(n)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    # a dividend on the first bar, or after a bar without a usable close, cannot be adjusted
+    usable = np.isfinite(prev_close) & (prev_close > 0) & (dividend > 0)
+    dividend_factor = np.ones(n)
+    dividend_factor[usable] = 1.0 - dividend[usable] / prev_close[usable]
+
+    event_factor = dividend_factor / _split_ratio(split)
+    after = np.cumprod(event_factor[::-1])[::-1]
+    return(np.append(after[1:], 1.0))
+
+def adjust_rows(rows):
+    '''
+    append (AdjOpen, AdjHigh, AdjLow, AdjClose, AdjVolume) to the full, date ordered history of
+    one ticker given as (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit) tuples
+    '''
+    if len(rows) == 0:
+        return([])
+    columns = list(zip(*rows))
+    prices = np.array(columns[2:6], dtype=np.float64)
+    split = np.array(columns[8], dtype=np.float64)
+    factor = calc_adjustment_factors(prices[3], np.array(columns[7], dtype=np.float64), split)
+    volume = np.array(columns[6], dtype=np.float64) * later_split_ratio(split)
+    adjusted = np.vstack([prices * factor, volume]).T.tolist()
+    return([tuple(row) + tuple(adj) for row, adj in zip(rows, adjusted)])
+
+def update_adjusted_prices(db_connection, ticker, db_table = 'EquityDailyPrice'):
+    '''
+    recompute the adjusted columns of a whole ticker from the table, without committing
+    '''
+    cursor = db_connection.cursor()
+    rows = cursor.execute(f"""SELECT Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit
+                              FROM {db_table} WHERE Ticker = ? ORDER BY AsOfDate""", (ticker,)).fetchall()
+    adjusted = adjust_rows(rows)
+    cursor.executemany(f"""UPDATE {db_table} SET AdjOpen = ?, AdjHigh = ?, AdjLow = ?, AdjClose = ?, AdjVolume = ?
+                           WHERE Ticker = ? AND AsOfDate = ?""",
+                       [row[9:14] + (row[0], row[1]) for row in adjusted])
+    return(len(adjusted))
+
+def has_events(rows):
+    # True if any of the rows carries a dividend or a split
+    for row in rows:
+        dividend, split = row[7], row[8]
+        if (dividend is not None and dividend != 0) or (split is not None and split not in (0, 1)):
+            return(True)
+    return(False)
+
+def refresh_adjusted_prices(db_connection, ticker, new_rows, db_table = 'EquityDailyPrice'):
+    '''
+    bring the adjusted columns up to date after new_rows were appended to a ticker, without committing
+
+    new bars are the latest ones, so without a dividend or split among them their factor is 1
+    and nothing older changes. Only when they carry an event is the whole ticker recomputed
+    '''
+    if len(new_rows) == 0:
+        return(0)
+    if has_events(new_rows):
+        return(update_adjusted_prices(db_connection, ticker, db_table))
+
+    first_date = min(row[1] for row in new_rows)
+    cursor = db_connection.cursor()
+    cursor.execute(f"""UPDATE {db_table} SET AdjOpen = Open, AdjHigh = High, AdjLow = Low, AdjClose = Close,
+                       AdjVolume = Volume WHERE Ticker = ? AND AsOfDate >= ?""", (ticker, first_date))
+    return(cursor.rowcount)
+
+def _test():
+    # 2:1 split on day 3 and a 1.0 dividend on day 5
+    close = np.array([100.0, 102.0, 51.0, 52.0, 50.0, 51.0])
+    dividend = np.array([0, 0, 0, 0, 1.0, 0])
+    split = np.array([0, 0, 2.0, 0, 0, 0])
+    factor = calc_adjustment_factors(close, dividend, split)
+    print("factors", factor)
+    print("adjusted close", close * factor)
+
+if __name__ == "__main__":
+    _test()
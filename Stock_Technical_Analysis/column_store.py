@@ -0,0 +1,158 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Columnar, memory mapped price store exported from the EquityDailyPrice table
+
+usage: python column_store.py --data_dir ./data [--tickers AAPL,MSFT] [--force]
+
+'''
+
+import os
+import shutil
+import datetime
+import numpy as np
+import pandas as pd
+
+import option
+import schema
+import connection
+from ohlcv import OHLCV
+
+
+class ColumnStore(object):
+    '''
+    Daily prices kept as one directory per ticker with one .npy file per column
+
+    Files are opened memory mapped, so loading a ticker only maps the files and reading a
+    date range only touches the pages of that range. get_daily_hist_price returns the same
+    data frame as Stock.get_daily_hist_price, and a ColumnStore can be given to Stock in
+    place of the database connection
+    '''
+    _fields = ('day', 'open', 'high', 'low', 'close', 'volume', 'dividend', 'split',
+               'adj_open', 'adj_high', 'adj_low', 'adj_close', 'adj_volume')
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _ticker_dir(self, ticker):
+        if os.sep in ticker or ticker.startswith('.'):
+            raise ValueError(f"Invalid ticker for the column store: {ticker}")
+        return(os.path.join(self.root_dir, ticker))
+
+    def tickers(self):
+        return(sorted(d for d in os.listdir(self.root_dir)
+                      if not d.startswith('.') and os.path.isdir(os.path.join(self.root_dir, d))))
+
+    def has_ticker(self, ticker):
+        return(os.path.isdir(self._ticker_dir(ticker)))
+
+    def get_ohlcv(self, ticker, start_date = None, end_date = None):
+        # memory mapped bars of a ticker, optionally restricted to [start_date, end_date]
+        ticker_dir = self._ticker_dir(ticker)
+        # tickers exported before a column was added read it as missing, which OHLCV fills in
+        columns = [np.load(path, mmap_mode='r') if os.path.exists(path) else None
+                   for path in (os.path.join(ticker_dir, f"{name}.npy") for name in ColumnStore._fields)]
+        bars = OHLCV(ticker, *columns)
+        if start_date is None and end_date is None:
+            return(bars)
+        return(bars.slice(start_date or datetime.date.min, end_date or datetime.date.max))
+
+    def get_daily_hist_price(self, ticker, start_date, end_date):
+        # same layout as Stock.get_daily_hist_price
+        if not self.has_ticker(ticker):
+            return(OHLCV(ticker, [], [], [], [], [], []).to_frame())
+        return(self.get_ohlcv(ticker, start_date, end_date).to_frame())
+
+    def load_universe(self, list_of_tickers = None):
+        # dict of ticker -> memory mapped OHLCV for every ticker in the store
+        if list_of_tickers is None:
+            list_of_tickers = self.tickers()
+        return({ticker: self.get_ohlcv(ticker) for ticker in list_of_tickers if self.has_ticker(ticker)})
+
+    def get_price_version(self, ticker):
+        # price version of EquityDailyPrice the ticker was exported at, see schema.get_price_version
+        # None as well when a column is missing, so that sync_from_sqlite exports the ticker again
+        ticker_dir = self._ticker_dir(ticker)
+        path = os.path.join(ticker_dir, "version.npy")
+        if not os.path.exists(path):
+            return(None)
+        if not all(os.path.exists(os.path.join(ticker_dir, f"{name}.npy")) for name in ColumnStore._fields):
+            return(None)
+        return(int(np.load(path)))
+
+    def write_ohlcv(self, bars, version = None):
+        # write into a temporary directory first and swap it in, so readers never see half a ticker
+        ticker_dir = self._ticker_dir(bars.ticker)
+        tmp_dir = os.path.join(self.root_dir, f".{bars.ticker}.tmp")
+        old_dir = os.path.join(self.root_dir, f".{bars.ticker}.old")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in ColumnStore._fields:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(getattr(bars, name)))
+        if version is not None:
+            np.save(os.path.join(tmp_dir, "version.npy"), np.int64(version))
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.isdir(ticker_dir):
+            os.replace(ticker_dir, old_dir)
+        os.replace(tmp_dir, ticker_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def sync_from_sqlite(self, db_connection, list_of_tickers = None, force = False):
+        '''
+        export tickers from the EquityDailyPrice table, all of them by default
+        unless force is set, tickers whose price version matches the one they were exported at
+        are skipped, so any rewrite of their rows is exported again. On a database without the
+        PriceChange table, see schema.py, every ticker is exported
+        returns the list of tickers written
+        '''
+        db_connection = connection.get_reader(db_connection)
+        stored = set(row[0] for row in db_connection.execute("SELECT DISTINCT Ticker FROM EquityDailyPrice"))
+        if list_of_tickers is None:
+            list_of_tickers = sorted(stored)
+
+        written = []
+        for ticker in list_of_tickers:
+            if ticker not in stored:
+                print(f"No data for {ticker} in EquityDailyPrice")
+                continue
+            # read the version before the rows, a write in between is then exported by the next sync
+            version = schema.get_price_version(db_connection, ticker)
+            if not force and version is not None and self.has_ticker(ticker) and self.get_price_version(ticker) == version:
+                continue
+            df = pd.read_sql("SELECT * FROM EquityDailyPrice WHERE Ticker = ? ORDER BY AsOfDate",
+                             db_connection, params=(ticker,))
+            df['AsOfDate'] = pd.to_datetime(df['AsOfDate'].str[:10], format="%Y-%m-%d")
+            self.write_ohlcv(OHLCV.from_frame(df, ticker), version)
+            written.append(ticker)
+
+        print(f"Exported {len(written)} of {len(list_of_tickers)} tickers to {self.root_dir}")
+        return(written)
+
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')
+    parser.add_argument('--store_dir', dest = 'store_dir', default=None, help='column store dir, data_dir/columnar by default')
+
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+    if opt.store_dir is None:
+        opt.store_dir = os.path.join(opt.data_dir, "columnar")
+
+    list_of_tickers = opt.tickers.split(',') if opt.tickers is not None else None
+
+    manager = connection.get_connection_manager(opt)
+    store = ColumnStore(opt.store_dir)
+    store.sync_from_sqlite(manager, list_of_tickers, force=opt.force)
+    manager.close()
+
+if __name__ == "__main__":
+    run()
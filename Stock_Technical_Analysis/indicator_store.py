@@ -0,0 +1,250 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Materialized indicators: the TA.py indicators of every ticker stored in Equity.db
+
+usage: python indicator_store.py --data_dir ./data [--tickers AAPL,MSFT] [--workers 4] [--force]
+
+'''
+
+import os
+import json
+import atexit
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import option
+import schema
+import connection
+import TA
+
+
+# (indicator, params) stored by default
+DEFAULT_INDICATORS = [('sma', (9,)), ('sma', (20,)), ('sma', (50,)), ('sma', (100,)), ('sma', (200,)),
+                      ('ema', (9,)), ('ema', (20,)), ('ema', (50,)), ('ema', (100,)), ('ema', (200,)),
+                      ('rsi', (14,)), ('vwap', ())]
+
+
+def params_key(params):
+    # params as stored in the Params column, e.g. '14' or '' for none
+    return(','.join(str(p) for p in params))
+
+def make_indicator(name, params):
+    # a TA.py indicator in streaming mode, without any history
+    if name == 'sma':
+        return(TA.SimpleMovingAverages(None, list(params)))
+    if name == 'ema':
+        return(TA.ExponentialMovingAverages(None, list(params)))
+    if name == 'rsi':
+        return(TA.RSI(None, *params))
+    if name == 'vwap':
+        return(TA.VWAP(None))
+    raise ValueError(f"Unknown indicator {name}")
+
+def _value(result):
+    # the moving averages return a dict of period -> value, with a single period here
+    if isinstance(result, dict):
+        (result,) = result.values()
+    return(None if result != result else result)
+
+# connection manager of a worker process, opened once by _init_worker and used for all its tickers
+_worker_manager = None
+
+def _init_worker(db_file):
+    # initializer of the worker processes of update_indicators
+    global _worker_manager
+    _worker_manager = connection.ConnectionManager(db_file)
+    atexit.register(_worker_manager.close)
+
+def _resume_point(stored, changed):
+    '''
+    (date, state) an indicator continues from, given its stored row and the first price date
+    changed since it was computed. (None, None) starts over from the first bar
+    '''
+    if stored is None:
+        return(None, None)
+    last_date, state, prev_date, prev_state, version = stored
+    if changed is None or changed > last_date:
+        return(last_date, state)
+    # the last bar was fetched again, as incremental updates do, redo it from the state before
+    if prev_date is not None and changed > prev_date:
+        return(prev_date, prev_state)
+    return(None, None)
+
+def update_ticker(db_file, ticker, indicators, force = False):
+    '''
+    compute the indicator values of one ticker that are not stored yet, runs in a worker process
+
+    each indicator continues from its stored state, so only the bars after its last stored
+    date are processed and the values are the same as recomputing the whole history. The
+    PriceChange log tells which prices were written since the state was computed: a rewritten
+    last bar is redone from the state before it, and older changes recompute the indicator.
+    returns (ticker, value rows, state rows, resets), where resets are (ticker, indicator,
+    params, date) whose values after date, or all of them when date is '', are stale
+    '''
+    # outside of a worker process, e.g. when called directly, a manager is opened for the call
+    owned = _worker_manager is None or _worker_manager.db_file != db_file
+    manager = connection.ConnectionManager(db_file) if owned else _worker_manager
+    try:
+        db_connection = connection.get_reader(manager)
+        stored = {}
+        if not force:
+            for name, params, *row in db_connection.execute(
+                    """SELECT Indicator, Params, AsOfDate, State, PrevAsOfDate, PrevState, PriceVersion
+                       FROM IndicatorState WHERE Ticker = ?""", (ticker,)):
+                stored[(name, params)] = tuple(row)
+
+        # read the version before the bars, a write in between is then picked up by the next run
+        price_version = schema.get_price_version(db_connection, ticker)
+        changes = {}
+        resume = {}
+        for name, params in indicators:
+            key = params_key(params)
+            row = stored.get((name, key))
+            changed = None
+            if row is not None:
+                since = row[4] or 0
+                if since not in changes:
+                    changes[since] = schema.get_price_changes(db_connection, ticker, since)[1]
+                changed = changes[since]
+            resume[(name, key)] = _resume_point(row, changed)
+
+        start_dates = [date for date, state in resume.values()]
+        first_date = None if None in start_dates else min(start_dates)
+        # the indicators read the adjusted prices, see TA.price_column
+        sql = "SELECT AsOfDate, AdjHigh, AdjLow, AdjClose, AdjVolume FROM EquityDailyPrice WHERE Ticker = ?"
+        args = (ticker,)
+        if first_date is not None:
+            sql += " AND AsOfDate > ?"
+            args = (ticker, first_date)
+        bars = db_connection.execute(sql + " ORDER BY AsOfDate", args).fetchall()
+    finally:
+        if owned:
+            manager.close()
+
+    columns = [TA.price_column(c) for c in ['High', 'Low', 'Close', 'Volume']]
+
+    def step(indicator, name, key, bar):
+        date, *values = bar
+        bar = {c: np.nan if v is None else v for c, v in zip(columns, values)}
+        return((ticker, name, key, date, _value(indicator.update(bar))))
+
+    values = []
+    new_states = []
+    resets = []
+    for name, params in indicators:
+        key = params_key(params)
+        row = stored.get((name, key))
+        start_date, state = resume[(name, key)]
+        if force or (row is not None and start_date != row[0]):
+            resets.append((ticker, name, key, start_date or ''))
+        todo = [bar for bar in bars if start_date is None or bar[0] > start_date]
+        if len(todo) == 0:
+            if row is not None and start_date == row[0]:
+                # nothing new, only record that the state is current
+                if row[4] != price_version:
+                    new_states.append((ticker, name, key) + row[:4] + (price_version,))
+            elif start_date is not None:
+                new_states.append((ticker, name, key, start_date, state, None, None, price_version))
+            continue
+
+        indicator = make_indicator(name, params)
+        if state is not None:
+            indicator.set_state(json.loads(state))
+        for bar in todo[:-1]:
+            values.append(step(indicator, name, key, bar))
+        prev_date = todo[-2][0] if len(todo) > 1 else start_date
+        prev_state = json.dumps(indicator.get_state())
+        values.append(step(indicator, name, key, todo[-1]))
+        new_states.append((ticker, name, key, todo[-1][0], json.dumps(indicator.get_state()),
+                           prev_date, prev_state if prev_date is not None else None, price_version))
+    return(ticker, values, new_states, resets)
+
+def update_indicators(db_connection, db_file, list_of_tickers = None, indicators = None, max_workers = 4, force = False):
+    '''
+    bring the indicator tables up to date for list_of_tickers, every ticker by default
+    tickers are computed on a pool of max_workers processes reading db_file, and written
+    through db_connection as they complete. Tickers whose prices were reloaded or adjusted
+    are recomputed on their own, force recomputes every ticker
+    returns the number of values written
+    '''
+    schema.create_schema(db_connection)
+    indicators = indicators if indicators is not None else DEFAULT_INDICATORS
+    if list_of_tickers is None:
+        list_of_tickers = [row[0] for row in db_connection.execute("SELECT DISTINCT Ticker FROM EquityDailyPrice ORDER BY Ticker")]
+
+    total = 0
+    failures = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(db_file,)) as executor:
+        futures = {executor.submit(update_ticker, db_file, ticker, indicators, force): ticker for ticker in list_of_tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                ticker, values, states, resets = future.result()
+            except Exception as e:
+                failures[ticker] = e
+                continue
+            for reset_ticker, name, key, after in resets:
+                db_connection.execute("DELETE FROM IndicatorValue WHERE Ticker = ? AND Indicator = ? AND Params = ? AND AsOfDate > ?",
+                                      (reset_ticker, name, key, after))
+                if after == '':
+                    db_connection.execute("DELETE FROM IndicatorState WHERE Ticker = ? AND Indicator = ? AND Params = ?",
+                                          (reset_ticker, name, key))
+            db_connection.executemany("INSERT OR REPLACE INTO IndicatorValue VALUES (?, ?, ?, ?, ?)", values)
+            db_connection.executemany("""INSERT OR REPLACE INTO IndicatorState
+                                         (Ticker, Indicator, Params, AsOfDate, State, PrevAsOfDate, PrevState, PriceVersion)
+                                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", states)
+            db_connection.commit()
+            total += len(values)
+
+    for ticker, e in failures.items():
+        print(f"Failed to update indicators for {ticker}: {e}")
+    print(f"Wrote {total} indicator values for {len(list_of_tickers) - len(failures)} tickers")
+    return(total)
+
+def get_indicator(db_connection, ticker, name, params, start_date, end_date):
+    '''
+    stored values of one indicator between start_date and end_date, as a series indexed
+    like Stock.get_daily_hist_price
+    '''
+    db_connection = connection.get_reader(db_connection)
+    sql = """SELECT AsOfDate, Value FROM IndicatorValue WHERE Ticker = ? AND Indicator = ? AND Params = ?
+             AND AsOfDate >= ? AND AsOfDate <= ? ORDER BY AsOfDate"""
+    rows = db_connection.execute(sql, (ticker, name, params_key(params), start_date.strftime("%Y-%m-%d"),
+                                       end_date.strftime("%Y-%m-%d"))).fetchall()
+    dates = [datetime.date.fromisoformat(row[0]) for row in rows]
+    values = np.array([np.nan if row[1] is None else row[1] for row in rows], dtype=np.float64)
+    return(pd.Series(values, index=pd.Index(dates, name='Date'), name=f"{name}({params_key(params)})"))
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')
+    parser.add_argument('--workers', dest = 'workers', type=int, default=4, help='number of worker processes')
+
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    list_of_tickers = opt.tickers.split(',') if opt.tickers is not None else None
+
+    # WAL lets the workers read while the results are written
+    manager = connection.get_connection_manager(opt)
+    try:
+        start = time.time()
+        update_indicators(manager.writer(), opt.sqlite_db, list_of_tickers, max_workers=opt.workers, force=opt.force)
+        print(f"Done in {time.time() - start:.1f}s")
+    finally:
+        manager.close()
+
+if __name__ == "__main__":
+    run()
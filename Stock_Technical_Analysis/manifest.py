@@ -0,0 +1,95 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Run manifest recording the progress of a Fetcher run so that it can be resumed
+
+'''
+
+import os
+import json
+import datetime
+import threading
+
+
+class RunManifest(object):
+    '''
+    JSON file with the status of every ticker of a run
+
+    status is 'downloaded' once the daily csv file is written and 'done' once the ticker's
+    rows are committed to the database, 'failed' tickers keep their last error. The file is
+    rewritten atomically after every change, so it is never left half written by a crash
+    '''
+    DOWNLOADED = 'downloaded'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path):
+        self.path = path
+        self.params = {}
+        self.tickers = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        # read the manifest back, an absent file is an empty run
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.params = data.get('params', {})
+            self.tickers = data.get('tickers', {})
+        return(self)
+
+    def reset(self, params = None):
+        # start a new run
+        with self._lock:
+            self.params = dict(params or {})
+            self.tickers = {}
+            self._save()
+
+    def status(self, ticker):
+        entry = self.tickers.get(ticker)
+        return(entry['status'] if entry is not None else None)
+
+    def last_date(self, ticker):
+        entry = self.tickers.get(ticker)
+        return(entry.get('last_date') if entry is not None else None)
+
+    def pending(self, list_of_tickers):
+        # tickers that are not done yet, in their original order
+        return([t for t in list_of_tickers if self.status(t) != RunManifest.DONE])
+
+    def mark_downloaded(self, ticker):
+        self._update(ticker, status=RunManifest.DOWNLOADED)
+
+    def mark_done(self, ticker, rows, last_date):
+        self._update(ticker, status=RunManifest.DONE, rows=rows, last_date=last_date, error=None)
+
+    def mark_failed(self, ticker, error):
+        self._update(ticker, status=RunManifest.FAILED, error=str(error))
+
+    def summary(self):
+        counts = {}
+        for entry in self.tickers.values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return(counts)
+
+    def _update(self, ticker, **fields):
+        with self._lock:
+            entry = self.tickers.setdefault(ticker, {})
+            entry.update(fields)
+            entry['updated'] = datetime.datetime.now().isoformat(timespec='seconds')
+            self._save()
+
+    def _save(self):
+        # caller holds the lock
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'params': self.params, 'tickers': self.tickers}, f, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,138 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Compact array based container for daily OHLCV data
+
+'''
+
+import datetime
+import numpy as np
+import pandas as pd
+
+
+class OHLCV(object):
+    '''
+    Daily bars of one ticker held as plain numpy columns
+
+    day is the int64 number of days since 1970-01-01, prices, dividend and split are float64
+    and volume is int64. Prices are as traded and the adj_ columns are split and dividend
+    adjusted, adj_volume split adjusted, as in EquityDailyPrice, they default to the traded prices when not given. Indexing with a column name of the EquityDailyPrice table returns a
+    pandas Series over the same memory, so the TA indicator classes accept an OHLCV wherever
+    they take an ohlcv_df
+    '''
+    __slots__ = ('ticker', 'day', 'open', 'high', 'low', 'close', 'volume', 'dividend', 'split',
+                 'adj_open', 'adj_high', 'adj_low', 'adj_close', 'adj_volume', '_index')
+
+    _columns = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close',
+                'Volume': 'volume', 'Dividend': 'dividend', 'StockSplit': 'split',
+                'AdjOpen': 'adj_open', 'AdjHigh': 'adj_high', 'AdjLow': 'adj_low', 'AdjClose': 'adj_close',
+                'AdjVolume': 'adj_volume'}
+
+    def __init__(self, ticker, day, open, high, low, close, volume, dividend = None, split = None,
+                 adj_open = None, adj_high = None, adj_low = None, adj_close = None, adj_volume = None):
+        n = len(day)
+        self.ticker = ticker
+        self.day = np.ascontiguousarray(day, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64)
+        self.dividend = np.zeros(n) if dividend is None else np.ascontiguousarray(dividend, dtype=np.float64)
+        self.split = np.zeros(n) if split is None else np.ascontiguousarray(split, dtype=np.float64)
+        self.adj_open = self.open if adj_open is None else np.ascontiguousarray(adj_open, dtype=np.float64)
+        self.adj_high = self.high if adj_high is None else np.ascontiguousarray(adj_high, dtype=np.float64)
+        self.adj_low = self.low if adj_low is None else np.ascontiguousarray(adj_low, dtype=np.float64)
+        self.adj_close = self.close if adj_close is None else np.ascontiguousarray(adj_close, dtype=np.float64)
+        self.adj_volume = self.volume if adj_volume is None else np.ascontiguousarray(adj_volume, dtype=np.float64)
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df, ticker = None):
+        '''
+        build from a data frame shaped like Stock.get_daily_hist_price, dates are taken from
+        the AsOfDate column if there is one, otherwise from the index
+        '''
+        dates = df['AsOfDate'] if 'AsOfDate' in df.columns else df.index
+        day = pd.to_datetime(np.asarray(dates)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        if ticker is None and 'Ticker' in df.columns and len(df) > 0:
+            ticker = df['Ticker'].iloc[0]
+
+        def column(name, dtype, fill = np.nan):
+            if name not in df.columns:
+                return(np.full(len(df), fill, dtype=dtype))
+            return(pd.to_numeric(df[name]).fillna(fill).to_numpy(dtype=dtype))
+
+        def adjusted(name):
+            return(column(name, np.float64) if name in df.columns else None)
+
+        return(cls(ticker, day, column('Open', np.float64), column('High', np.float64), column('Low', np.float64),
+                   column('Close', np.float64), column('Volume', np.int64, 0),
+                   column('Dividend', np.float64, 0.0), column('StockSplit', np.float64, 0.0),
+                   adjusted('AdjOpen'), adjusted('AdjHigh'), adjusted('AdjLow'), adjusted('AdjClose'),
+                   adjusted('AdjVolume')))
+
+    def to_frame(self):
+        # data frame with the same columns and Date index as Stock.get_daily_hist_price
+        dates = self.day.astype('datetime64[D]').astype(object)
+        df = pd.DataFrame({'Ticker': self.ticker, 'AsOfDate': dates,
+                           'Open': self.open, 'High': self.high, 'Low': self.low, 'Close': self.close,
+                           'Volume': self.volume, 'Dividend': self.dividend, 'StockSplit': self.split,
+                           'AdjOpen': self.adj_open, 'AdjHigh': self.adj_high, 'AdjLow': self.adj_low,
+                           'AdjClose': self.adj_close, 'AdjVolume': self.adj_volume},
+                          index=pd.Index(dates, name='Date'))
+        return(df)
+
+    def __len__(self):
+        return(len(self.day))
+
+    @property
+    def columns(self):
+        return(list(OHLCV._columns.keys()))
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = pd.DatetimeIndex(self.day.astype('datetime64[D]'), name='Date')
+        return(self._index)
+
+    @property
+    def nbytes(self):
+        # the adjusted prices share memory with the traded ones when they were not given
+        arrays = {id(getattr(self, name)): getattr(self, name) for name in ('day',) + tuple(OHLCV._columns.values())}
+        return(sum(a.nbytes for a in arrays.values()))
+
+    def __getitem__(self, name):
+        values = getattr(self, OHLCV._columns[name])
+        return(pd.Series(values, index=self.index, name=name, copy=False))
+
+    def slice(self, start_date, end_date):
+        # bars between start_date and end_date (both inclusive), sharing memory with this one
+        epoch = datetime.date(1970, 1, 1)
+        lo = np.searchsorted(self.day, (start_date - epoch).days, side='left')
+        hi = np.searchsorted(self.day, (end_date - epoch).days, side='right')
+        return(OHLCV(self.ticker, self.day[lo:hi], self.open[lo:hi], self.high[lo:hi], self.low[lo:hi],
+                     self.close[lo:hi], self.volume[lo:hi], self.dividend[lo:hi], self.split[lo:hi],
+                     self.adj_open[lo:hi], self.adj_high[lo:hi], self.adj_low[lo:hi], self.adj_close[lo:hi],
+                     self.adj_volume[lo:hi]))
+
+
+def _test():
+    dates = [datetime.date(2023, 1, 2) + datetime.timedelta(days=i) for i in range(300)]
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(size=300))
+    df = pd.DataFrame({'Ticker': 'TEST', 'AsOfDate': dates, 'Open': close, 'High': close + 1, 'Low': close - 1,
+                       'Close': close, 'Volume': 1000, 'Dividend': 0.0, 'StockSplit': 0.0},
+                      index=pd.Index(dates, name='Date'))
+
+    bars = OHLCV.from_frame(df)
+    print(f"data frame {df.memory_usage(index=True, deep=True).sum()} bytes, OHLCV {bars.nbytes} bytes")
+    print(bars['Close'].rolling(window=20).mean().tail())
+    print(bars.slice(datetime.date(2023, 3, 1), datetime.date(2023, 3, 5)).to_frame())
+
+if __name__ == "__main__":
+    _test()
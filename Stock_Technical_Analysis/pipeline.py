@@ -0,0 +1,161 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Streaming ingestion pipeline: download, validate and write stages connected by bounded queues
+
+'''
+
+import asyncio
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+import schema
+from Fetcher import RateLimiter
+
+
+class IngestPipeline(object):
+    '''
+    Streams tickers from Yahoo into EquityDailyPrice
+
+    max_concurrency download tasks fetch tickers on a thread pool, a validation task checks
+    every frame and turns it into rows, and a single writer task replaces each ticker's rows
+    and commits once batch_size rows are pending. The stages are connected by queues of
+    queue_size items, so downloads wait when the writer falls behind and memory stays bounded
+    whatever the size of the universe. The writes and commits run on a dedicated thread, so
+    the event loop keeps handing out downloads while one is in progress. The connection
+    is only ever used from that thread during the run, but it has to allow it, as
+    ConnectionManager.writer() does
+    '''
+    def __init__(self, fetcher, max_concurrency = 8, queue_size = 16, batch_size = 100000,
+                 requests_per_second = None, max_retries = 0, backoff = 1.0):
+        self.fetcher = fetcher
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rows_written = 0
+
+    def validate(self, ticker, df):
+        '''
+        return the rows of a downloaded frame, or raise ValueError if it cannot be loaded
+        '''
+        if df is None or len(df) == 0:
+            raise ValueError("no data returned")
+        missing = [c for c in ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits'] if c not in df.columns]
+        if missing:
+            raise ValueError(f"missing columns {missing}")
+        if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+            raise ValueError("dates are not sorted or not unique")
+        close = df['Close'].to_numpy(dtype=np.float64)
+        if np.isnan(close).all():
+            raise ValueError("no close prices")
+        if (close <= 0).any():
+            raise ValueError("non positive close prices")
+        return(self.fetcher.frame_to_rows(df, ticker))
+
+    async def _download(self, tickers, raw_queue, executor, rate_limiter, failures):
+        loop = asyncio.get_running_loop()
+        opt = self.fetcher.opt
+        while True:
+            try:
+                ticker = tickers.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                df = await loop.run_in_executor(executor, self.fetcher.get_daily_with_retry, ticker,
+                                                opt.start_date, opt.end_date, rate_limiter,
+                                                self.max_retries, self.backoff)
+            except Exception as e:
+                failures[ticker] = e
+                continue
+            # blocks while the queue is full, which is what holds the downloads back
+            await raw_queue.put((ticker, df))
+
+    async def _validate(self, raw_queue, write_queue, failures):
+        while True:
+            item = await raw_queue.get()
+            if item is None:
+                await write_queue.put(None)
+                return
+            ticker, df = item
+            try:
+                rows = self.validate(ticker, df)
+            except Exception as e:
+                failures[ticker] = e
+                continue
+            await write_queue.put((ticker, rows))
+
+    async def _write(self, write_queue, write_executor):
+        loop = asyncio.get_running_loop()
+        pending = 0
+        pending_tickers = []
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                break
+            ticker, rows = item
+            pending += await loop.run_in_executor(write_executor, self.fetcher.rows_to_table, rows, ticker)
+            pending_tickers.append((ticker, rows))
+            if pending >= self.batch_size:
+                await loop.run_in_executor(write_executor, self._commit, pending, pending_tickers)
+                pending = 0
+                pending_tickers = []
+        await loop.run_in_executor(write_executor, self._commit, pending, pending_tickers)
+
+    def _commit(self, pending, pending_tickers):
+        self.fetcher.db_connection.commit()
+        for ticker, rows in pending_tickers:
+            self.fetcher._invalidate_cache(ticker)
+            self.fetcher._checkpoint(ticker, rows)
+        self.rows_written += pending
+
+    async def _run(self, list_of_tickers, failures):
+        tickers = asyncio.Queue()
+        for ticker in list_of_tickers:
+            tickers.put_nowait(ticker)
+        raw_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+        rate_limiter = RateLimiter(self.requests_per_second)
+
+        # one thread for the writes, the sqlite connection is not shared between threads
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor, \
+                ThreadPoolExecutor(max_workers=1) as write_executor:
+            validator = asyncio.create_task(self._validate(raw_queue, write_queue, failures))
+            writer = asyncio.create_task(self._write(write_queue, write_executor))
+            downloaders = [asyncio.create_task(self._download(tickers, raw_queue, executor, rate_limiter, failures))
+                           for i in range(self.max_concurrency)]
+
+            async def produce():
+                await asyncio.gather(*downloaders)
+                await raw_queue.put(None)
+
+            # stop everything as soon as a stage fails, otherwise the others would wait on full queues
+            stages = [asyncio.create_task(produce()), validator, writer]
+            done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    for other in downloaders + stages:
+                        other.cancel()
+                    raise task.exception()
+
+    def run(self, list_of_tickers):
+        '''
+        load every ticker, returns a dict of ticker -> error for the tickers that failed
+        '''
+        schema.create_schema(self.fetcher.db_connection)
+        failures = {}
+        self.rows_written = 0
+        with self.fetcher.bulk_load_mode():
+            asyncio.run(self._run(list(list_of_tickers), failures))
+
+        self.fetcher._print_failures(list_of_tickers, failures)
+        print(f"Loaded {self.rows_written} rows into EquityDailyPrice")
+        return(failures)
@@ -0,0 +1,146 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Process wide LRU cache of daily OHLCV data frames
+
+'''
+
+import threading
+import collections
+import numpy as np
+import pandas as pd
+
+
+def get_db_name(db_connection):
+    '''
+    name used to key the cache on a database, the file behind the main schema of the connection
+    in memory databases are private to their connection, so the connection itself is used
+    '''
+    row = db_connection.execute("PRAGMA database_list").fetchone()
+    if row is None or not row[2]:
+        return(f"memory:{id(db_connection)}")
+    return(row[2])
+
+class PriceCache(object):
+    '''
+    LRU cache of OHLCV data frames keyed on (db, ticker, start_date, end_date)
+
+    Entries are evicted least recently used first once the frames held take more than
+    max_bytes. Every entry remembers the price version of its ticker, see schema.get_price_version,
+    and get drops it when the caller passes a different one, so a write committed by another
+    process is seen as well as the ones invalidated in this process. get and put return a
+    copy of the cached frame, which callers are free to modify.
+    '''
+    def __init__(self, max_bytes = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._keys_by_ticker = collections.defaultdict(set)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return(len(self._entries))
+
+    @property
+    def nbytes(self):
+        return(self._nbytes)
+
+    def get(self, db, ticker, start_date, end_date, version = None):
+        # return a copy of the cached frame, or None on a miss or when the entry is from another version
+        key = (db, ticker, start_date, end_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] != version:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return(None)
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return(entry[0].copy())
+
+    def put(self, db, ticker, start_date, end_date, df, version = None):
+        '''
+        cache a copy of df, read at the given price version, and return df
+        the version has to be read before the rows, so a write in between leaves the entry stale
+        instead of labelling the old rows with the new version
+        '''
+        key = (db, ticker, start_date, end_date)
+        cached = df.copy()
+        nbytes = int(cached.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._remove(key)
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (cached, nbytes, version)
+                self._keys_by_ticker[(db, ticker)].add(key)
+                self._nbytes += nbytes
+                while self._nbytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+        return(df)
+
+    def invalidate(self, db, ticker = None):
+        # drop every window cached for a ticker, or for the whole database when ticker is None
+        with self._lock:
+            if ticker is None:
+                keys = [k for k in self._entries if k[0] == db]
+            else:
+                keys = list(self._keys_by_ticker.get((db, ticker), ()))
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_ticker.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        return({'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'nbytes': self._nbytes})
+
+    def _remove(self, key):
+        # caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._nbytes -= entry[1]
+        keys = self._keys_by_ticker.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_ticker[key[:2]]
+
+
+# shared by every Stock in the process and invalidated by the Fetcher when it writes new rows
+PRICE_CACHE = PriceCache()
+
+
+def _test():
+    cache = PriceCache(max_bytes = 4000)
+    dates = pd.date_range('2023-01-02', periods=20, freq='B').date
+    df = pd.DataFrame({'Close': np.arange(20, dtype=float), 'Volume': np.arange(20)}, index=dates)
+
+    view = cache.put('db', 'AAPL', dates[0], dates[-1], df, version = 1)
+    view.loc[dates[0], 'Close'] = -1
+    view['returns'] = view['Close'].pct_change()
+    cached = cache.get('db', 'AAPL', dates[0], dates[-1], version = 1)
+    print("copies do not reach the cache:", cached.columns.tolist(), cached['Close'].iloc[0])
+    print("written by another process:", cache.get('db', 'AAPL', dates[0], dates[-1], version = 2))
+    print(cache.get('db', 'MSFT', dates[0], dates[-1]))
+
+    for i in range(10):
+        cache.put('db', f"T{i}", dates[0], dates[-1], df)
+    print("after eviction", cache.stats())
+
+    cache.invalidate('db', 'T9')
+    print("after invalidate", cache.stats())
+
+if __name__ == "__main__":
+    _test()
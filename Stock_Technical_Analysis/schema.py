@@ -0,0 +1,270 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Schema of the Equity.db sqlite database and the migration tool that upgrades an existing database in place
+
+usage: python schema.py --data_dir ./data
+
+'''
+
+import os
+import sqlite3
+
+import option
+import adjustment
+import connection
+
+# bump this and add a step to _MIGRATIONS whenever the schema changes
+SCHEMA_VERSION = 7
+
+# AsOfDate is stored as YYYY-MM-DD text, which sorts in date order and is a quarter of the size of
+# the timestamps yahoo returns. The table is clustered on (Ticker, AsOfDate), so reading the history
+# of one ticker is an index range scan instead of a full table scan.
+# Prices are as traded, the Adj columns are split and dividend adjusted and AdjVolume is split
+# adjusted, see adjustment.py
+EQUITY_DAILY_PRICE_DDL = '''
+CREATE TABLE IF NOT EXISTS EquityDailyPrice (
+    Ticker      TEXT NOT NULL,
+    AsOfDate    TEXT NOT NULL,
+    Open        REAL,
+    High        REAL,
+    Low         REAL,
+    Close       REAL,
+    Volume      INTEGER,
+    Dividend    REAL,
+    StockSplit  REAL,
+    AdjOpen     REAL,
+    AdjHigh     REAL,
+    AdjLow      REAL,
+    AdjClose    REAL,
+    AdjVolume   REAL,
+    PRIMARY KEY (Ticker, AsOfDate)
+) WITHOUT ROWID
+'''
+
+# indicators materialized by indicator_store.py, one value per bar and the streaming state
+# after the last stored bar, from which later runs append the new dates. The state before the
+# last bar and the PriceChange version they were computed from let a run redo the last bar
+# when it was fetched again, and recompute the history when older prices changed
+INDICATOR_VALUE_DDL = '''
+CREATE TABLE IF NOT EXISTS IndicatorValue (
+    Ticker      TEXT NOT NULL,
+    Indicator   TEXT NOT NULL,
+    Params      TEXT NOT NULL,
+    AsOfDate    TEXT NOT NULL,
+    Value       REAL,
+    PRIMARY KEY (Ticker, Indicator, Params, AsOfDate)
+) WITHOUT ROWID
+'''
+
+INDICATOR_STATE_DDL = '''
+CREATE TABLE IF NOT EXISTS IndicatorState (
+    Ticker      TEXT NOT NULL,
+    Indicator   TEXT NOT NULL,
+    Params      TEXT NOT NULL,
+    AsOfDate    TEXT NOT NULL,
+    State       TEXT NOT NULL,
+    PrevAsOfDate TEXT,
+    PrevState   TEXT,
+    PriceVersion INTEGER,
+    PRIMARY KEY (Ticker, Indicator, Params)
+) WITHOUT ROWID
+'''
+
+# one row per write to the prices of a ticker, so readers in any process can tell that what they
+# computed or cached from the table is stale. FromDate is the first AsOfDate the write may have
+# changed, '' when the whole history of the ticker was rewritten
+PRICE_CHANGE_DDL = '''
+CREATE TABLE IF NOT EXISTS PriceChange (
+    Ticker      TEXT NOT NULL,
+    Version     INTEGER NOT NULL,
+    FromDate    TEXT NOT NULL,
+    PRIMARY KEY (Ticker, Version)
+) WITHOUT ROWID
+'''
+
+
+def get_schema_version(db_connection):
+    return(db_connection.execute("PRAGMA user_version").fetchone()[0])
+
+def _set_schema_version(db_connection, version):
+    db_connection.execute(f"PRAGMA user_version = {int(version)}")
+
+def _table_exists(db_connection, table):
+    row = db_connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return(row is not None)
+
+def _migrate_v1(db_connection):
+    '''
+    rebuild EquityDailyPrice with the (Ticker, AsOfDate) primary key and YYYY-MM-DD dates
+    if a ticker has the same date twice the last row wins
+    '''
+    if not _table_exists(db_connection, 'EquityDailyPrice'):
+        db_connection.execute(EQUITY_DAILY_PRICE_DDL)
+        return
+
+    # the version 1 layout, without the Adj columns added by _migrate_v2
+    ddl = '\n'.join(line for line in EQUITY_DAILY_PRICE_DDL.split('\n') if 'Adj' not in line)
+    db_connection.execute("DROP TABLE IF EXISTS EquityDailyPrice_new")
+    db_connection.execute(ddl.replace('EquityDailyPrice', 'EquityDailyPrice_new', 1))
+    db_connection.execute('''
+        INSERT OR REPLACE INTO EquityDailyPrice_new
+            (Ticker, AsOfDate, Open, High, Low, Close, Volume, Dividend, StockSplit)
+        SELECT Ticker, substr(AsOfDate, 1, 10), Open, High, Low, Close, Volume, Dividend, StockSplit
+        FROM EquityDailyPrice
+        ORDER BY rowid''')
+    db_connection.execute("DROP TABLE EquityDailyPrice")
+    db_connection.execute("ALTER TABLE EquityDailyPrice_new RENAME TO EquityDailyPrice")
+
+def _migrate_v2(db_connection):
+    '''
+    add the split and dividend adjusted price columns, _migrate_v7 fills them for every ticker
+    '''
+    columns = [row[1] for row in db_connection.execute("PRAGMA table_info(EquityDailyPrice)")]
+    for c in ['AdjOpen', 'AdjHigh', 'AdjLow', 'AdjClose']:
+        if c not in columns:
+            db_connection.execute(f"ALTER TABLE EquityDailyPrice ADD COLUMN {c} REAL")
+
+def _migrate_v3(db_connection):
+    # add the materialized indicator tables
+    db_connection.execute(INDICATOR_VALUE_DDL)
+    db_connection.execute(INDICATOR_STATE_DDL)
+
+def _migrate_v4(db_connection):
+    # add the per ticker change log of the prices
+    db_connection.execute(PRICE_CHANGE_DDL)
+
+def _migrate_v5(db_connection):
+    # keep the indicator state before the last bar and the price version it was computed from
+    columns = [row[1] for row in db_connection.execute("PRAGMA table_info(IndicatorState)")]
+    for c, t in [('PrevAsOfDate', 'TEXT'), ('PrevState', 'TEXT'), ('PriceVersion', 'INTEGER')]:
+        if c not in columns:
+            db_connection.execute(f"ALTER TABLE IndicatorState ADD COLUMN {c} {t}")
+
+def _migrate_v6(db_connection):
+    # the indicators are computed from the adjusted prices, drop the ones stored from the traded
+    # prices so that indicator_store.py rebuilds them
+    db_connection.execute("DELETE FROM IndicatorValue")
+    db_connection.execute("DELETE FROM IndicatorState")
+
+def _migrate_v7(db_connection):
+    '''
+    add the split adjusted volume and fill all the adjusted columns for every ticker, then drop
+    the stored VWAP, which weighted the adjusted prices by the traded volume
+    '''
+    columns = [row[1] for row in db_connection.execute("PRAGMA table_info(EquityDailyPrice)")]
+    if 'AdjVolume' not in columns:
+        db_connection.execute("ALTER TABLE EquityDailyPrice ADD COLUMN AdjVolume REAL")
+    tickers = [row[0] for row in db_connection.execute("SELECT DISTINCT Ticker FROM EquityDailyPrice")]
+    for ticker in tickers:
+        adjustment.update_adjusted_prices(db_connection, ticker)
+    db_connection.execute("DELETE FROM IndicatorValue WHERE Indicator = 'vwap'")
+    db_connection.execute("DELETE FROM IndicatorState WHERE Indicator = 'vwap'")
+
+_MIGRATIONS = [(1, _migrate_v1), (2, _migrate_v2), (3, _migrate_v3), (4, _migrate_v4), (5, _migrate_v5),
+               (6, _migrate_v6), (7, _migrate_v7)]
+
+def migrate(db_connection):
+    '''
+    bring the database up to SCHEMA_VERSION, creating the tables if they do not exist
+    every step runs in its own transaction, so an interrupted migration leaves the
+    database at the previous version
+    '''
+    version = get_schema_version(db_connection)
+    for target, step in _MIGRATIONS:
+        if version >= target:
+            continue
+        print(f"Migrating database from version {version} to {target}")
+        db_connection.commit()
+        try:
+            db_connection.execute("BEGIN")
+            step(db_connection)
+            _set_schema_version(db_connection, target)
+            db_connection.commit()
+        except Exception:
+            db_connection.rollback()
+            raise
+        version = target
+
+    return(version)
+
+def create_schema(db_connection):
+    # create or upgrade all the tables used by the projects
+    return(migrate(db_connection))
+
+def record_price_change(db_connection, ticker, from_date = ''):
+    '''
+    bump the price version of a ticker after its rows changed from from_date on, without committing
+    every writer of EquityDailyPrice calls this in the same transaction as the write
+    '''
+    db_connection.execute("""INSERT INTO PriceChange (Ticker, Version, FromDate)
+                             SELECT ?, COALESCE(MAX(Version), 0) + 1, ? FROM PriceChange WHERE Ticker = ?""",
+                          (ticker, from_date, ticker))
+
+def get_price_version(db_connection, ticker):
+    '''
+    current price version of a ticker, 0 if its prices were never written since the change log exists
+    None on a database that has not been migrated to version 4 yet
+    '''
+    try:
+        row = db_connection.execute("SELECT COALESCE(MAX(Version), 0) FROM PriceChange WHERE Ticker = ?", (ticker,)).fetchone()
+    except sqlite3.OperationalError:
+        return(None)
+    return(row[0])
+
+def get_price_changes(db_connection, ticker, since_version):
+    '''
+    (version, from_date) of the prices of a ticker: the current version and the first AsOfDate
+    written after since_version, None when nothing changed and '' when the whole history did
+    '''
+    row = db_connection.execute("""SELECT COALESCE(MAX(Version), 0), MIN(FromDate) FROM PriceChange
+                                   WHERE Ticker = ? AND Version > ?""", (ticker, since_version)).fetchone()
+    if row[1] is None:
+        return(get_price_version(db_connection, ticker), None)
+    return(row[0], row[1])
+
+def _test():
+    # migrate an old style table in memory and check the lookup uses the primary key
+    db_connection = sqlite3.connect(':memory:')
+    db_connection.execute('''CREATE TABLE EquityDailyPrice (Ticker TEXT, AsOfDate TEXT, Open REAL, High REAL, Low REAL,
+                             Close REAL, Volume INTEGER, Dividend REAL, StockSplit REAL)''')
+    db_connection.executemany("INSERT INTO EquityDailyPrice VALUES (?, ?, 1, 2, 0.5, 1.5, 100, 0, 0)",
+                              [('AAPL', '2023-01-03 00:00:00-05:00'), ('AAPL', '2023-01-04 00:00:00-05:00'),
+                               ('MSFT', '2023-01-03 00:00:00-05:00')])
+    db_connection.commit()
+
+    print("version", migrate(db_connection))
+    print(db_connection.execute("SELECT * FROM EquityDailyPrice").fetchall())
+    plan = db_connection.execute("EXPLAIN QUERY PLAN SELECT * FROM EquityDailyPrice WHERE Ticker = 'AAPL' ORDER BY AsOfDate").fetchall()
+    print(plan)
+
+    record_price_change(db_connection, 'AAPL')
+    record_price_change(db_connection, 'AAPL', '2023-01-04')
+    print("AAPL version", get_price_version(db_connection, 'AAPL'), get_price_changes(db_connection, 'AAPL', 1))
+    print("MSFT version", get_price_version(db_connection, 'MSFT'), get_price_changes(db_connection, 'MSFT', 0))
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')
+
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    manager = connection.get_connection_manager(opt)
+    try:
+        db_connection = manager.writer()
+        print(f"Database {opt.sqlite_db} is at version {get_schema_version(db_connection)}")
+        version = migrate(db_connection)
+        print(f"Database {opt.sqlite_db} is now at version {version}")
+    finally:
+        manager.close()
+
+if __name__ == "__main__":
+    run()
@@ -1,87 +1,204 @@
-'''
-@project       : Temple University CIS 4360 Computational Methods in Finance
-@Instructor    : Dr. Alex Pang
-
-@Student Name  : Giorgio Tatarelli
-
-@Date          : 9/1/2023
-
-Download daily stock price from Yahoo
-
-'''
-
-import os
-import pandas as pd
-import numpy as np
-import datetime 
-import sqlite3
-
-from utils import MyYahooFinancials 
-import option
-
-class Stock(object):
-    '''
-    Stock class for getting financial statements as well as pricing data
-    '''
-    def __init__(self, opt, db_connection, ticker):
-        self.opt = opt
-        self.db_connection = db_connection
-        self.ticker = ticker
-        self.ohlcv_df = None
-        
-
-    def get_daily_hist_price(self, start_date, end_date):
-        # Get daily historical OHLCV from database
-        try:
-            sql = f"select * from EquityDailyPrice where ticker = '{self.ticker}' order by AsOfDate asc"
-            df = pd.read_sql(sql, self.db_connection)
-            df['AsOfDate'] = df['AsOfDate'].apply(lambda x: datetime.datetime.strptime(x[:10], "%Y-%m-%d").date())
-
-            # filter data between start and end date
-            df = df[ df.AsOfDate >= start_date ]
-            df = df[ df.AsOfDate <= end_date ]
-
-            # create an index based on the AsOfDate column
-            df['Date'] = df.AsOfDate
-            df = df.set_index('Date')
-            
-            self.ohlcv_df = df
-            return(df)
-            
-        except Exception as e:
-            print(f"Failed to get data for {self.ticker}: {e}")
-            raise Exception(e)
-
-def _test():
-    # a few basic unit tests
-
-    dt = datetime.datetime.strptime("2013-01-02", "%Y-%m-%d")
-    
-    parser = option.get_default_parser()
-    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
-    
-    args = parser.parse_args()
-    opt = option.Option(args = args)
-
-    opt.output_dir = os.path.join(opt.data_dir, "daily")
-    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
-
-    db_file = opt.sqlite_db
-    db_connection = sqlite3.connect(db_file)
-
-    print(vars(opt))
-    
-    symbol = 'AAPL'
-    stock = Stock(opt, db_connection, symbol)
-    #
-    
-    start_date = datetime.date(2020, 1, 1)
-    end_date = datetime.date(2023, 10, 1)
-    df = stock.get_daily_hist_price(start_date, end_date)
-
-    print(df.head())
-
-
-
-if __name__ == "__main__":
-    _test()
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 9/1/2023
+
+Download daily stock price from Yahoo
+
+'''
+
+import os
+import pandas as pd
+import numpy as np
+import datetime 
+
+from utils import MyYahooFinancials 
+import option
+import schema
+import price_cache
+import connection
+from ohlcv import OHLCV
+from column_store import ColumnStore
+
+class Stock(object):
+    '''
+    Stock class for getting financial statements as well as pricing data
+
+    db_connection is a sqlite connection or a connection.ConnectionManager, in which case every
+    query runs on the read only connection of the calling thread. It can also be a
+    column_store.ColumnStore, prices are then read from the memory mapped files.
+    price history is served from price_cache.PRICE_CACHE when use_cache is True, checked against
+    the price version of the ticker on every read, and each call returns its own copy
+    '''
+    def __init__(self, opt, db_connection, ticker, use_cache = True):
+        self.opt = opt
+        self.db_connection = db_connection
+        self.ticker = ticker
+        self.ohlcv_df = None
+        self.cache = price_cache.PRICE_CACHE if use_cache else None
+        
+
+    def get_daily_hist_price(self, start_date, end_date):
+        # Get daily historical OHLCV from cache or database
+        if self.cache is None:
+            self.ohlcv_df = self._read_daily_hist_price(start_date, end_date)
+            return(self.ohlcv_df)
+
+        db = self._get_db_name()
+        version = self._get_price_version()
+        df = self.cache.get(db, self.ticker, start_date, end_date, version)
+        if df is None:
+            df = self.cache.put(db, self.ticker, start_date, end_date,
+                                self._read_daily_hist_price(start_date, end_date), version)
+        self.ohlcv_df = df
+        return(df)
+
+    def get_daily_hist_ohlcv(self, start_date, end_date):
+        # Get daily historical OHLCV as a compact ohlcv.OHLCV container
+        if isinstance(self.db_connection, ColumnStore):
+            return(self.db_connection.get_ohlcv(self.ticker, start_date, end_date))
+        return(OHLCV.from_frame(self.get_daily_hist_price(start_date, end_date), self.ticker))
+
+    def _get_db_name(self):
+        # name of the price source in the cache keys
+        if isinstance(self.db_connection, ColumnStore):
+            return(self.db_connection.root_dir)
+        return(price_cache.get_db_name(connection.get_reader(self.db_connection)))
+
+    def _get_price_version(self):
+        # version the cached frames are checked against
+        if isinstance(self.db_connection, ColumnStore):
+            return(self.db_connection.get_price_version(self.ticker) if self.db_connection.has_ticker(self.ticker) else None)
+        return(schema.get_price_version(connection.get_reader(self.db_connection), self.ticker))
+
+    def _read_daily_hist_price(self, start_date, end_date):
+        # Get daily historical OHLCV from database
+        if isinstance(self.db_connection, ColumnStore):
+            return(self.db_connection.get_daily_hist_price(self.ticker, start_date, end_date))
+        try:
+            # filter data between start and end date in the query. AsOfDate is compared as YYYY-MM-DD text
+            # and the end is made exclusive one day later, so rows stored with a time part are still included
+            sql = "select * from EquityDailyPrice where Ticker = ? and AsOfDate >= ? and AsOfDate < ? order by AsOfDate asc"
+            params = (self.ticker, start_date.strftime("%Y-%m-%d"),
+                      (end_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+            df = pd.read_sql(sql, connection.get_reader(self.db_connection), params=params)
+            df['AsOfDate'] = pd.to_datetime(df['AsOfDate'].str[:10], format="%Y-%m-%d").dt.date
+
+            # create an index based on the AsOfDate column
+            df['Date'] = df.AsOfDate
+            df = df.set_index('Date')
+            
+            return(df)
+            
+        except Exception as e:
+            print(f"Failed to get data for {self.ticker}: {e}")
+            raise Exception(e)
+
+class PricePanel(object):
+    '''
+    Daily prices of many tickers aligned on one set of dates
+
+    dates is a numpy datetime64[D] array and every field is a C contiguous float64 array of
+    shape (len(dates), len(tickers)), with NaN where a ticker has no bar on that date
+    '''
+    def __init__(self, dates, tickers, data):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.data = data
+
+    @property
+    def fields(self):
+        return(list(self.data.keys()))
+
+    def get_field(self, field):
+        # the dates x tickers array of one field, not a copy
+        return(self.data[field])
+
+    def get_frame(self, field):
+        # one field as a dates x tickers data frame sharing memory with the panel
+        return(pd.DataFrame(self.data[field], index=pd.Index(self.dates, name='Date'),
+                            columns=self.tickers, copy=False))
+
+    def to_frame(self):
+        # all fields as a wide data frame with (field, ticker) columns
+        frames = {field: self.get_frame(field) for field in self.data}
+        return(pd.concat(frames, axis=1))
+
+
+def load_price_panel(db_connection, list_of_tickers, start_date, end_date,
+                     fields = ('Open', 'High', 'Low', 'Close', 'Volume', 'AdjOpen', 'AdjHigh', 'AdjLow', 'AdjClose',
+                               'AdjVolume'),
+                     chunk_size = 500):
+    '''
+    load the daily prices of many tickers between start_date and end_date (both inclusive)
+    with one query per chunk_size tickers and return them as a PricePanel
+    db_connection is a sqlite connection or a connection.ConnectionManager
+    '''
+    db_connection = connection.get_reader(db_connection)
+    # a database from before some of the fields were added has a panel without them
+    stored = set(row[1] for row in db_connection.execute("PRAGMA table_info(EquityDailyPrice)"))
+    fields = [field for field in fields if field in stored]
+    list_of_tickers = list(list_of_tickers)
+    start = start_date.strftime("%Y-%m-%d")
+    end = (end_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    columns = ', '.join(fields)
+
+    frames = []
+    for i in range(0, len(list_of_tickers), chunk_size):
+        chunk = list_of_tickers[i:i + chunk_size]
+        placeholders = ', '.join(['?'] * len(chunk))
+        sql = f"select Ticker, AsOfDate, {columns} from EquityDailyPrice where Ticker in ({placeholders}) and AsOfDate >= ? and AsOfDate < ?"
+        frames.append(pd.read_sql(sql, db_connection, params=chunk + [start, end]))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Ticker', 'AsOfDate'] + list(fields))
+
+    # scatter the long rows into the dates x tickers arrays
+    days = df['AsOfDate'].str[:10].to_numpy(dtype='datetime64[D]')
+    dates, row = np.unique(days, return_inverse=True)
+    col = pd.Index(list_of_tickers).get_indexer(df['Ticker'])
+
+    data = {}
+    for field in fields:
+        values = np.full((len(dates), len(list_of_tickers)), np.nan)
+        values[row, col] = df[field].to_numpy(dtype=np.float64, na_value=np.nan)
+        data[field] = values
+
+    return(PricePanel(dates, list_of_tickers, data))
+
+def _test():
+    # a few basic unit tests
+
+    dt = datetime.datetime.strptime("2013-01-02", "%Y-%m-%d")
+    
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')    
+    
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+
+    opt.output_dir = os.path.join(opt.data_dir, "daily")
+    opt.sqlite_db = os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+
+    manager = connection.get_connection_manager(opt)
+
+    print(vars(opt))
+    
+    symbol = 'AAPL'
+    stock = Stock(opt, manager, symbol)
+    #
+    
+    start_date = datetime.date(2020, 1, 1)
+    end_date = datetime.date(2023, 10, 1)
+    df = stock.get_daily_hist_price(start_date, end_date)
+
+    print(df.head())
+
+    panel = load_price_panel(manager, ['AAPL', 'MSFT', 'NVDA'], start_date, end_date)
+    print(panel.get_frame('Close').tail())
+    manager.close()
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,226 @@
+'''
+@project       : Temple University CIS 4360 Computational Methods in Finance
+@Instructor    : Dr. Alex Pang
+
+@Student Name  : Giorgio Tatarelli
+
+@Date          : 10/17/2026
+
+Generate a synthetic EquityDailyPrice table for tests and load testing, without network access
+
+usage: python synthetic_db.py --data_dir ./data --num_tickers 500 --years 20 [--freq B] [--model gbm|jump]
+
+'''
+
+import os
+import time
+import sqlite3
+import numpy as np
+import pandas as pd
+
+import option
+import schema
+import connection
+import adjustment
+import price_cache
+
+
+class SyntheticMarket(object):
+    '''
+    Generates bars as traded for a universe of tickers
+
+    Total returns are a one factor model, a common market return times the ticker's beta plus
+    an idiosyncratic part, either geometric brownian motion or Merton jump diffusion. On top
+    of that tickers split 2, 3 or 4 for 1 when their price gets high, most of them pay
+    quarterly dividends, volume grows with the size of the move and a share of the tickers
+    only list part way through the history, so histories are ragged like the real universe.
+    The same seed always gives the same market
+    '''
+    def __init__(self, dates, model = 'gbm', seed = 0, jump_intensity = 2.0, late_listing = 0.1):
+        if model not in ('gbm', 'jump'):
+            raise ValueError(f"Unknown price model {model}")
+        self.dates = pd.DatetimeIndex(dates)
+        self.model = model
+        self.seed = seed
+        self.jump_intensity = jump_intensity
+        self.late_listing = late_listing
+        # year fraction of one bar, from the average spacing of the dates
+        n = len(self.dates)
+        span = (self.dates[-1] - self.dates[0]).days if n > 1 else 1
+        self.dt = span / 365.25 / max(n - 1, 1)
+        self.market_returns = self._factor_returns(np.random.default_rng([seed]), 0.07, 0.16)
+
+    def _factor_returns(self, rng, mu, sigma):
+        return((mu - 0.5 * sigma ** 2) * self.dt + sigma * np.sqrt(self.dt) * rng.standard_normal(len(self.dates)))
+
+    def _jumps(self, rng):
+        # compensated compound poisson log jumps
+        n = len(self.dates)
+        count = rng.poisson(self.jump_intensity * self.dt, n)
+        mean, std = -0.02, 0.06
+        size = np.where(count > 0, mean * count + std * np.sqrt(count) * rng.standard_normal(n), 0.0)
+        compensator = self.jump_intensity * (np.exp(mean + 0.5 * std ** 2) - 1) * self.dt
+        return(size - compensator)
+
+    def generate(self, index):
+        '''
+        dict of column arrays of the index-th ticker: day (datetime64[D]), open, high, low,
+        close, volume, dividend and split, prices as traded
+        '''
+        rng = np.random.default_rng([self.seed, index + 1])
+        n = len(self.dates)
+        beta = rng.uniform(0.5, 1.6)
+        sigma = rng.uniform(0.15, 0.45)
+        log_returns = beta * self.market_returns + self._factor_returns(rng, rng.normal(0.02, 0.04), sigma)
+        if self.model == 'jump':
+            log_returns += self._jumps(rng)
+        total_return = rng.lognormal(np.log(40), 0.8) * np.exp(np.cumsum(log_returns))
+
+        # dividends take their yield out of the price on the first bar of every quarter
+        if rng.random() < 0.6:
+            quarter = self.dates.year * 4 + (self.dates.month - 1) // 3
+            ex_date = np.append(False, np.diff(quarter) != 0)
+            dividend_yield = np.where(ex_date, rng.uniform(0.005, 0.04) / 4, 0.0)
+        else:
+            dividend_yield = np.zeros(n)
+        close = total_return * np.cumprod(1 - dividend_yield)
+
+        # shares split when the price goes above a random threshold, at most once a year
+        split = np.zeros(n)
+        shares = np.ones(n)
+        threshold = rng.uniform(300, 900)
+        bars_per_year = max(int(round(1 / self.dt)), 1)
+        i = 0
+        while True:
+            above = np.flatnonzero(close[i:] / shares[i:] > threshold)
+            if len(above) == 0:
+                break
+            i += above[0]
+            ratio = rng.choice([2.0, 3.0, 4.0])
+            split[i] = ratio
+            shares[i:] *= ratio
+            i += bars_per_year
+            if i >= n:
+                break
+        close = close / shares
+        prev_close = np.append(close[0], close[:-1])
+        dividend = np.round(dividend_yield * prev_close, 4)
+
+        # intraday range scales with the volatility of one bar
+        bar_vol = sigma * np.sqrt(self.dt)
+        open_ = prev_close * np.exp(0.3 * bar_vol * rng.standard_normal(n))
+        # on a split day the previous close is in pre split shares
+        open_[split > 0] = close[split > 0] * np.exp(0.3 * bar_vol * rng.standard_normal(int((split > 0).sum())))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal(n)) * 0.5 * bar_vol)
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal(n)) * 0.5 * bar_vol)
+
+        # dollar volume is stable per ticker, busier on big moves, shares follow the price
+        dollar_volume = rng.lognormal(np.log(5e7), 1.0)
+        activity = rng.lognormal(0, 0.35, n) * (1 + np.abs(log_returns) / bar_vol / 2)
+        volume = np.maximum(np.round(dollar_volume * activity / close), 1).astype(np.int64)
+
+        bars = {'day': self.dates.values.astype('datetime64[D]'), 'open': open_, 'high': high, 'low': low,
+                'close': close, 'volume': volume, 'dividend': dividend, 'split': split}
+        if rng.random() < self.late_listing:
+            first = rng.integers(1, max(n // 2, 2))
+            bars = {k: v[first:] for k, v in bars.items()}
+        return(bars)
+
+
+def synthetic_tickers(num_tickers):
+    # T0001, T0002, ...
+    width = max(4, len(str(num_tickers)))
+    return([f"T{i + 1:0{width}d}" for i in range(num_tickers)])
+
+def bars_to_rows(ticker, bars):
+    # EquityDailyPrice rows of one ticker, adjusted columns included
+    factor = adjustment.calc_adjustment_factors(bars['close'], bars['dividend'], bars['split'])
+    columns = [np.datetime_as_string(bars['day'], unit='D').tolist()]
+    columns += [bars[k].tolist() for k in ('open', 'high', 'low', 'close', 'volume', 'dividend', 'split')]
+    columns += [(bars[k] * factor).tolist() for k in ('open', 'high', 'low', 'close')]
+    columns += [(bars['volume'] * adjustment.later_split_ratio(bars['split'])).tolist()]
+    return(list(zip([ticker] * len(columns[0]), *columns)))
+
+def generate_database(db_connection, list_of_tickers, start_date, end_date, freq = 'B', model = 'gbm',
+                      seed = 0, batch_size = 200000):
+    '''
+    replace the rows of list_of_tickers in EquityDailyPrice with synthetic bars between
+    start_date and end_date, committing every batch_size rows. returns the number of rows
+    '''
+    schema.create_schema(db_connection)
+    dates = pd.date_range(start_date, end_date, freq=freq, inclusive='left')
+    if len(dates) == 0:
+        raise ValueError(f"No {freq} bars between {start_date} and {end_date}")
+    market = SyntheticMarket(dates, model=model, seed=seed)
+
+    cursor = db_connection.cursor()
+    synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+    # NORMAL is still corruption safe in WAL mode, see Fetcher.bulk_load_mode
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    total = 0
+    pending = 0
+    try:
+        for i, ticker in enumerate(list_of_tickers):
+            rows = bars_to_rows(ticker, market.generate(i))
+            cursor.execute("DELETE FROM EquityDailyPrice WHERE Ticker = ?", (ticker,))
+            cursor.executemany("INSERT INTO EquityDailyPrice VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            schema.record_price_change(db_connection, ticker)
+            pending += len(rows)
+            if pending >= batch_size:
+                db_connection.commit()
+                total += pending
+                pending = 0
+        db_connection.commit()
+        total += pending
+    except BaseException:
+        db_connection.rollback()
+        raise
+    finally:
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+        price_cache.PRICE_CACHE.invalidate(price_cache.get_db_name(db_connection))
+    return(total)
+
+def _test():
+    dates = pd.date_range('2004-01-01', '2024-01-01', freq='B', inclusive='left')
+    market = SyntheticMarket(dates, model='jump', seed=1)
+    bars = market.generate(0)
+    rows = bars_to_rows('T0001', bars)
+    print(len(rows), rows[0])
+    print("splits", bars['split'][bars['split'] > 0], "dividends", int((bars['dividend'] > 0).sum()))
+
+    db_connection = sqlite3.connect(':memory:')
+    start = time.time()
+    total = generate_database(db_connection, synthetic_tickers(20), '2004-01-01', '2024-01-01', seed=1)
+    print(f"{total} rows in {time.time() - start:.2f}s")
+    print(db_connection.execute("SELECT Ticker, COUNT(*), MIN(AsOfDate), MAX(AsOfDate) FROM EquityDailyPrice GROUP BY Ticker LIMIT 3").fetchall())
+
+def run():
+    #
+    parser = option.get_default_parser()
+    parser.add_argument('--data_dir', dest = 'data_dir', default='./data', help='data dir')
+    parser.add_argument('--db', dest = 'db', default=None, help='database file, data_dir/sqlitedb/Equity.db by default')
+    parser.add_argument('--num_tickers', dest = 'num_tickers', type=int, default=500, help='number of synthetic tickers, unless --tickers is given')
+    parser.add_argument('--years', dest = 'years', type=int, default=None, help='years of history up to end_date, instead of start_date')
+    parser.add_argument('--freq', dest = 'freq', default='B', help='pandas frequency of the bars, B for business days')
+    parser.add_argument('--model', dest = 'model', default='gbm', choices=['gbm', 'jump'], help='price model')
+    parser.add_argument('--seed', dest = 'seed', type=int, default=0, help='random seed')
+
+    args = parser.parse_args()
+    opt = option.Option(args = args)
+    opt.sqlite_db = opt.db if opt.db is not None else os.path.join(opt.data_dir, "sqlitedb/Equity.db")
+    if opt.years is not None:
+        opt.start_date = (pd.Timestamp(opt.end_date) - pd.DateOffset(years=opt.years)).strftime('%Y-%m-%d')
+
+    list_of_tickers = opt.tickers.split(',') if opt.tickers is not None else synthetic_tickers(opt.num_tickers)
+
+    manager = connection.get_connection_manager(opt)
+    try:
+        start = time.time()
+        total = generate_database(manager.writer(), list_of_tickers, opt.start_date, opt.end_date, freq=opt.freq,
+                                  model=opt.model, seed=opt.seed)
+        print(f"Wrote {total} rows for {len(list_of_tickers)} tickers into {opt.sqlite_db} in {time.time() - start:.1f}s")
+    finally:
+        manager.close()
+
+if __name__ == "__main__":
+    run()